@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Save and load collections of Articles, together with the citation network,
+in a columnar format - a NumPy .npz archive with one or two arrays per
+Article attribute. Every column can be loaded on its own, so e.g. getting the
+Year and pubNoCitations of all the Articles doesn't touch their abstracts.
+
+Numeric attributes are stored as int64 arrays. Strings are stored Arrow-style
+as one uint8 array with all the UTF-8 bytes plus an int64 array of offsets,
+and lists of strings (Authors, Keywords) additionally have an array with the
+offsets of every Article's entries.
+
+@author: Alek
+@version: 1.0.2
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Store crawledNoCitations for DownloadArticles.refreshNetwork.
+                - 1.0.2 - Alek - Made packStrings and unpackStrings public, TextResources.TokenCache uses them too.
+"""
+import numpy, networkx
+import Article
+
+FORMAT_VERSION = 2
+
+" Stored attributes of the Articles and the values used when an Article doesn't have them. "
+INT_COLUMNS = {'Year':9999, 'Vol':-1, 'No':-1, 'CiteULikeID':-1, 'pubNoCitations':0, 'crawledNoCitations':-1}
+STRING_COLUMNS = {'Title':'', 'Journal':'', 'DOI':'', 'Abstract':'', 'fullURL':'Unavailable', 'pubURL':'',
+    'citingArticlesURL':'UNKNOWN', 'relatedArticlesURL':'UNKNOWN'}
+LIST_COLUMNS = ['Authors', 'Keywords']
+COLUMNS = sorted(INT_COLUMNS.keys()+STRING_COLUMNS.keys()+LIST_COLUMNS)
+
+def _toBytes(value):
+    """ Get a UTF-8 str out of whatever's stored in an Article attribute. """
+    if isinstance(value,unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+def _toInt(value, default):
+    """ Get an int out of whatever's stored in an Article attribute. """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def packStrings(strings):
+    """ Pack a list of strs into a uint8 array of bytes and an int64 array of
+    offsets, the i-th string being data[offsets[i]:offsets[i+1]]. """
+    offsets = numpy.zeros(len(strings)+1,dtype=numpy.int64)
+    numpy.cumsum([len(s) for s in strings],out=offsets[1:])
+    return numpy.frombuffer(''.join(strings),dtype=numpy.uint8), offsets
+
+def unpackStrings(data, offsets):
+    """ Inverse of packStrings, returns a list of strs. """
+    blob = data.tobytes()
+    offsets = offsets.tolist()
+    return [blob[offsets[i]:offsets[i+1]] for i in xrange(len(offsets)-1)]
+
+def saveArticles(fileName, articles, network=None, compressed=True):
+    """ Save Articles and, optionally, the citation network between them.
+
+    Arguments
+    ----------
+    fileName - str with the path to the .npz file.
+    articles - list of Articles, e.g. allArticles of DownloadArticles.
+    network - networkx.DiGraph or None, whose nodes are the indices of the
+        articles (@see DownloadArticles.addCitingArticlesToNetwork).
+    compressed - bool, whether to compress the columns; smaller but slower
+        to save and load.
+    """
+    columns = {'version':numpy.array([FORMAT_VERSION]), 'noArticles':numpy.array([len(articles)])}
+    for name, default in INT_COLUMNS.items():
+        columns[name] = numpy.array([_toInt(getattr(art,name,default),default) for art in articles],dtype=numpy.int64) # None becomes the default too.
+    for name, default in STRING_COLUMNS.items():
+        columns[name+'.data'], columns[name+'.offsets'] = packStrings([_toBytes(getattr(art,name,default)) for art in articles])
+    for name in LIST_COLUMNS:
+        lists = [getattr(art,name,None) or [] for art in articles]
+        columns[name+'.data'], columns[name+'.offsets'] = packStrings([_toBytes(s) for l in lists for s in l])
+        columns[name+'.lists'] = numpy.zeros(len(lists)+1,dtype=numpy.int64)
+        numpy.cumsum([len(l) for l in lists],out=columns[name+'.lists'][1:])
+
+    if network is None:
+        columns['edges'] = numpy.zeros((0,2),dtype=numpy.int64)
+    else:
+        columns['edges'] = numpy.array(list(network.edges()),dtype=numpy.int64).reshape(-1,2)
+
+    if compressed:
+        numpy.savez_compressed(fileName,**columns)
+    else:
+        numpy.savez(fileName,**columns)
+
+def loadColumns(fileName, columns=None):
+    """ Load only the chosen attributes of the saved Articles.
+
+    Arguments
+    ----------
+    fileName - str with the path to the .npz file saved with saveArticles.
+    columns - list of str with the names of the attributes to load, e.g.
+        ['Year','pubNoCitations']; all of COLUMNS if None.
+
+    Returns
+    ----------
+    dict with attribute names as keys and, as values:
+        * numpy.ndarrays of int64 for INT_COLUMNS,
+        * lists of str for STRING_COLUMNS,
+        * lists of lists of str for LIST_COLUMNS.
+
+    Raises
+    ----------
+    KeyError if any of the columns doesn't exist.
+    """
+    columns = COLUMNS if columns is None else columns
+    result = {}
+    with numpy.load(fileName) as archive: # Only decompresses the arrays that are accessed.
+        for name in columns:
+            if name in INT_COLUMNS:
+                if name in archive.files:
+                    result[name] = archive[name]
+                else: # Saved by an older version.
+                    result[name] = numpy.full(int(archive['noArticles'][0]),INT_COLUMNS[name],dtype=numpy.int64)
+            elif name in STRING_COLUMNS:
+                result[name] = unpackStrings(archive[name+'.data'],archive[name+'.offsets'])
+            elif name in LIST_COLUMNS:
+                values = unpackStrings(archive[name+'.data'],archive[name+'.offsets'])
+                lists = archive[name+'.lists'].tolist()
+                result[name] = [values[lists[i]:lists[i+1]] for i in xrange(len(lists)-1)]
+            else:
+                raise KeyError("Unknown column {}, expected one of {}.".format(name,COLUMNS))
+    return result
+
+def loadNetwork(fileName):
+    """ Load the citation network saved with saveArticles.
+
+    Returns
+    ----------
+    networkx.DiGraph with the indices of the Articles as nodes.
+    """
+    with numpy.load(fileName) as archive:
+        noArticles = int(archive['noArticles'][0])
+        edges = archive['edges']
+    network = networkx.DiGraph()
+    network.add_nodes_from(xrange(noArticles))
+    network.add_edges_from(edges.tolist())
+    return network
+
+def loadArticles(fileName):
+    """ Load all the Articles saved with saveArticles.
+
+    Returns
+    ----------
+    list of Articles, in the order they were saved.
+    """
+    c = loadColumns(fileName)
+    for name in INT_COLUMNS: # Indexing lists of ints is much faster than indexing numpy.ndarrays.
+        c[name] = c[name].tolist()
+    articles = []
+    for i in xrange(len(c['Title'])):
+        art = Article.Article(c['Title'][i], c['Authors'][i], c['Year'][i], c['Journal'][i], doi=c['DOI'][i],
+            volume=c['Vol'][i], number=c['No'][i], tagList=c['Keywords'][i], abstract=c['Abstract'][i],
+            citeULikeID=c['CiteULikeID'][i])
+        art.fullURL = c['fullURL'][i]
+        art.pubURL = c['pubURL'][i]
+        art.citingArticlesURL = c['citingArticlesURL'][i]
+        art.relatedArticlesURL = c['relatedArticlesURL'][i]
+        art.pubNoCitations = c['pubNoCitations'][i]
+        if c['crawledNoCitations'][i] >= 0: # Only the Articles whose citing Articles have been crawled have it.
+            art.crawledNoCitations = c['crawledNoCitations'][i]
+        articles.append(art)
+    return articles
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Index the authors of a collection of Articles. Author names come in many forms -
+"DF Easton" from Google Scholar, "H.M. Mott-Smith" or "Irving Langmuir" from
+CiteULike, with varying spacing and a trailing ellipsis when Scholar cuts the
+list of authors short. Every name is normalised to a "surname initials" key,
+e.g. "langmuir i", and every key has a posting list of the IDs (indices in the
+list of Articles) of the Articles it appears in. The co-authorship graph is
+a sparse matrix with the number of Articles every pair of authors share.
+
+Example
+----------
+<tt>
+> index = AuthorIndex(allArticles)\n
+> index.getArticles("I. Langmuir")\n
+> index.getArticlesBySurname("Langmuir")\n
+> index.getCoauthors("Irving Langmuir")
+</tt>
+
+@author: Alek
+@version: 1.0.1
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Keep the non-ASCII letters of the names, drop the co-authorship diagonal without a LIL matrix.
+"""
+import re, numpy, scipy.sparse
+
+ELLIPSES = [u'\u2026', u'...'] # The unicode ellipsis, and the ASCII one.
+NonLetterPattern = re.compile(u"[^\\w\\-']|[\\d_]", re.UNICODE) # Characters that aren't part of a surname, letters in any script are.
+
+def _normaliseSurname(surname):
+    """ Lower-case unicode surname without the characters that aren't letters, hyphens or apostrophes. """
+    if not isinstance(surname,unicode):
+        surname = surname.decode('utf-8','replace')
+    return NonLetterPattern.sub(u'',surname.lower())
+
+def normaliseAuthorName(name):
+    """ Get the key of an author name, i.e. lower-case surname and initials
+    separated by a space.
+
+    Arguments
+    ----------
+    name - str or unicode with the author name, e.g. "DF Easton", "H.M. Mott-Smith",
+        "Irving Langmuir" or "Langmuir, I.".
+
+    Returns
+    ----------
+    str with the key, e.g. "easton df", "mott-smith hm", "langmuir i", or
+        None if there's no name there (e.g. only an ellipsis).
+    """
+    if not isinstance(name,unicode): # Work on characters, not on the UTF-8 bytes.
+        name = name.decode('utf-8','replace')
+    for ellipsis in ELLIPSES:
+        name = name.replace(ellipsis,u' ')
+
+    if ',' in name: # Surname first.
+        surname, given = name.split(u',',1)
+        given = given.replace(u'.',u'. ').split()
+    else: # Surname last.
+        tokens = name.replace(u'.',u'. ').split()
+        if not tokens:
+            return None
+        surname, given = tokens[-1], tokens[:-1]
+
+    surname = _normaliseSurname(surname)
+    if not surname:
+        return None
+
+    initials = []
+    for token in given:
+        token = token.strip(u'.')
+        if token.isupper() and len(token) <= 3: # Scholar-style initials, e.g. DF.
+            initials.extend(token.lower())
+        elif token:
+            initials.append(token[0].lower())
+    return (surname+u' '+u''.join(initials)).encode('utf-8')
+
+class AuthorIndex(object):
+    """ Maps normalised author names to the Articles they've written and to
+    their co-authors. Articles can be added incrementally, the co-authorship
+    matrix is rebuilt the next time it's needed.
+    """
+    def __init__(self, articles=[]):
+        """
+        Arguments
+        ----------
+        articles - list of Articles to index; their IDs are their indices in
+            this list.
+        """
+        self.keys = [] # Author ID -> author key.
+        self.authorIDs = {} # Author key -> author ID.
+        self.postings = [] # Author ID -> sorted list of Article IDs.
+        self.surnames = {} # Surname -> list of author IDs.
+        self.noArticles = 0
+        self._articleAuthors = [] # Article ID -> list of author IDs, to build the co-authorship matrix.
+        self._coauthors = None # Sparse co-authorship matrix, built lazily.
+        self._nameKeys = {} # Raw author name -> key, the same names appear in many Articles.
+        self.addArticles(articles)
+
+    def addArticles(self, articles):
+        """ Add more Articles to the index. Their IDs continue from the last
+        Article that's been added, i.e. they're the indices in allArticles if
+        the Articles are added as allArticles is extended.
+
+        Arguments
+        ----------
+        articles - list of Articles.
+
+        Returns
+        ----------
+        list of ints with the IDs given to the Articles.
+        """
+        ids = range(self.noArticles,self.noArticles+len(articles))
+        for articleID, art in zip(ids,articles):
+            authorIDs = []
+            for name in art.Authors:
+                key = self._nameKeys.get(name,False)
+                if key is False:
+                    key = self._nameKeys[name] = normaliseAuthorName(name)
+                if key is None:
+                    continue
+                authorID = self.authorIDs.get(key)
+                if authorID is None: # A new author.
+                    authorID = self.authorIDs[key] = len(self.keys)
+                    self.keys.append(key)
+                    self.postings.append([])
+                    self.surnames.setdefault(key.split(' ')[0],[]).append(authorID)
+                if authorID not in authorIDs: # Same author twice in one Article.
+                    authorIDs.append(authorID)
+                    self.postings[authorID].append(articleID)
+            self._articleAuthors.append(authorIDs)
+        self.noArticles += len(articles)
+        self._coauthors = None
+        return ids
+
+    def getArticles(self, name):
+        """ Get the IDs of the Articles written by the author with the given
+        name, in any form accepted by normaliseAuthorName.
+
+        Returns
+        ----------
+        list of ints with Article IDs, empty if the author's unknown.
+        """
+        authorID = self.authorIDs.get(normaliseAuthorName(name))
+        return [] if authorID is None else list(self.postings[authorID])
+
+    def getArticlesBySurname(self, surname):
+        """ Get the IDs of the Articles written by any author with the given
+        surname, regardless of the initials.
+
+        Returns
+        ----------
+        sorted list of ints with Article IDs.
+        """
+        ids = set()
+        for authorID in self.surnames.get(_normaliseSurname(surname).encode('utf-8'),[]):
+            ids.update(self.postings[authorID])
+        return sorted(ids)
+
+    def getCoauthorshipMatrix(self):
+        """ Get the co-authorship matrix.
+
+        Returns
+        ----------
+        scipy.sparse.csr_matrix of shape (no. authors, no. authors) with the
+            no. Articles every pair of authors has written together, and zeros
+            on the diagonal. Row and column indices are author IDs.
+        """
+        if self._coauthors is None:
+            rows = numpy.repeat(numpy.arange(len(self._articleAuthors)),[len(a) for a in self._articleAuthors])
+            cols = numpy.array([i for a in self._articleAuthors for i in a],dtype=numpy.int64)
+            incidence = scipy.sparse.csr_matrix((numpy.ones(cols.size,dtype=numpy.int32),(rows,cols)),
+                shape=(len(self._articleAuthors),len(self.keys))) # Articles x authors.
+            coauthors = (incidence.T*incidence).tocsr()
+            self._coauthors = (coauthors-scipy.sparse.diags(coauthors.diagonal(),dtype=coauthors.dtype)).tocsr() # Nobody's their own co-author.
+            self._coauthors.eliminate_zeros()
+        return self._coauthors
+
+    def getCoauthors(self, name, top=None):
+        """ Get the co-authors of the author with the given name.
+
+        Arguments
+        ----------
+        name - str with the author name, @see normaliseAuthorName.
+        top - int or None, how many of the most frequent co-authors to return;
+            all of them if None.
+
+        Returns
+        ----------
+        list of 2-tuples with the co-author keys and the no. Articles written
+            together, most frequent first.
+        """
+        authorID = self.authorIDs.get(normaliseAuthorName(name))
+        if authorID is None:
+            return []
+        row = self.getCoauthorshipMatrix().getrow(authorID)
+        order = numpy.argsort(-row.data,kind='mergesort')[:top]
+        return [(self.keys[row.indices[i]],int(row.data[i])) for i in order]
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Timers and counters for the stages of the crawl and the analysis - fetching,
+cache lookups, parsing, deduplication, keyword extraction, building features
+and clustering. Disabled by default, in which case every timed call costs one
+check of a module-level flag. Once enabled, the metrics can be exported as
+JSON or in the Prometheus text format, and every stage can optionally be
+profiled with cProfile.
+
+Example
+----------
+<tt>
+> CrawlMetrics.enable(profile=True)\n
+> DownloadArticles.addCitingArticlesToNetwork(allArticles, 0, G)\n
+> print CrawlMetrics.toPrometheus()\n
+> CrawlMetrics.printProfile('parse')
+</tt>
+
+@author: Alek
+@version: 1.0.1
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Added stage.start and stage.stop to time the blocks that aren't in a with statement.
+"""
+import time, json, threading, functools, cProfile, pstats
+
+_enabled = False # Whether to record anything at all.
+_profiling = False # Whether to also run cProfile for every stage.
+_lock = threading.Lock()
+_stages = {} # Stage name -> [no. calls, total time, min time, max time] in seconds.
+_counters = {} # Counter name -> value.
+_profiles = {} # Stage name -> cProfile.Profile.
+_activeProfiles = threading.local() # Stack of the profiles of the nested stages, only one can run at a time.
+
+def enable(profile=False):
+    """ Start recording the metrics.
+
+    Arguments
+    ----------
+    profile - bool, whether to also run cProfile for every stage; slows things
+        down a lot more than the timers.
+    """
+    global _enabled, _profiling
+    _enabled = True
+    _profiling = profile
+
+def disable():
+    """ Stop recording the metrics, keep the ones recorded so far. """
+    global _enabled, _profiling
+    _enabled = False
+    _profiling = False
+
+def isEnabled():
+    """ Whether the metrics are being recorded. """
+    return _enabled
+
+def reset():
+    """ Forget all the metrics recorded so far. """
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _profiles.clear()
+
+def increment(name, n=1):
+    """ Add n to the counter with the given name. """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name,0)+n
+
+def record(name, dt):
+    """ Record that the stage with the given name took dt seconds. """
+    with _lock:
+        s = _stages.get(name)
+        if s is None:
+            _stages[name] = [1, dt, dt, dt]
+        else:
+            s[0] += 1
+            s[1] += dt
+            if dt < s[2]:
+                s[2] = dt
+            if dt > s[3]:
+                s[3] = dt
+
+class stage(object):
+    """ Context manager that times a block of code as the given stage.
+
+    Example
+    ----------
+    <tt>
+    > with CrawlMetrics.stage('parse'):\n
+    >     soup = BeautifulSoup(html, "lxml")
+    </tt>
+    """
+    __slots__ = ['name','startTime','profile']
+
+    def __init__(self, name):
+        self.name = name
+        self.startTime = None
+        self.profile = None
+
+    def __enter__(self):
+        if _enabled:
+            if _profiling:
+                self.profile = _startProfile(self.name)
+            self.startTime = time.time()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if self.startTime is not None:
+            record(self.name, time.time()-self.startTime)
+            if self.profile is not None:
+                _stopProfile(self.profile)
+        return False # Don't swallow the exceptions.
+
+    def start(self):
+        """ Start timing the stage without a with statement, e.g. not to
+        re-indent a long block of code. Returns the stage, call stop() on it. """
+        return self.__enter__()
+
+    def stop(self):
+        """ Stop timing the stage started with start(). """
+        self.__exit__(None, None, None)
+
+def timed(name):
+    """ Decorator that times every call to the function as the given stage. """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _startProfile(name):
+    """ Pause the profile of the enclosing stage, if any, and start the one of this stage. """
+    stack = getattr(_activeProfiles,'stack',None)
+    if stack is None:
+        stack = _activeProfiles.stack = []
+    with _lock:
+        profile = _profiles.get(name)
+        if profile is None:
+            profile = _profiles[name] = cProfile.Profile()
+    if stack:
+        stack[-1].disable()
+    stack.append(profile)
+    profile.enable()
+    return profile
+
+def _stopProfile(profile):
+    """ Stop the profile of this stage and resume the one of the enclosing stage. """
+    profile.disable()
+    stack = _activeProfiles.stack
+    stack.pop()
+    if stack:
+        stack[-1].enable()
+
+def getMetrics():
+    """ Get all the metrics recorded so far.
+
+    Returns
+    ----------
+    dict with:
+        stages - dict with stage names as keys and dicts with calls, total,
+            mean, min and max times in seconds as values,
+        counters - dict with counter names as keys and their values.
+    """
+    with _lock:
+        stages = dict((name, {'calls':s[0], 'total':s[1], 'mean':s[1]/s[0], 'min':s[2], 'max':s[3]})
+            for name,s in _stages.items())
+        return {'stages':stages, 'counters':dict(_counters)}
+
+def toJSON(indent=None):
+    """ Get the metrics, @see getMetrics, as a JSON str. """
+    return json.dumps(getMetrics(), indent=indent, sort_keys=True)
+
+def saveJSON(fileName):
+    """ Save the metrics, @see getMetrics, to a JSON file. """
+    with open(fileName,'w') as metricsFile:
+        metricsFile.write(toJSON(indent=2))
+
+def toPrometheus(prefix='scholar_crawl'):
+    """ Get the metrics in the Prometheus text exposition format.
+
+    Arguments
+    ----------
+    prefix - str, prepended to the names of all the metrics.
+
+    Returns
+    ----------
+    str with the metrics, one per line.
+    """
+    metrics = getMetrics()
+    lines = []
+    for metric, key, kind, description in [('stage_seconds_total','total','counter','Time spent in the stage.'),
+            ('stage_calls_total','calls','counter','Number of times the stage was run.'),
+            ('stage_seconds_max','max','gauge','Longest single run of the stage.')]:
+        lines.append('# HELP {}_{} {}'.format(prefix,metric,description))
+        lines.append('# TYPE {}_{} {}'.format(prefix,metric,kind))
+        for name in sorted(metrics['stages']):
+            lines.append('{}_{}{{stage="{}"}} {}'.format(prefix,metric,name,metrics['stages'][name][key]))
+    lines.append('# HELP {}_events_total Number of times the event happened.'.format(prefix))
+    lines.append('# TYPE {}_events_total counter'.format(prefix))
+    for name in sorted(metrics['counters']):
+        lines.append('{}_events_total{{event="{}"}} {}'.format(prefix,name,metrics['counters'][name]))
+    return '\n'.join(lines)+'\n'
+
+def printProfile(name, sortBy='cumulative', limit=20):
+    """ Print the cProfile statistics of the given stage. Only available if
+    the metrics were enabled with profile=True.
+
+    Arguments
+    ----------
+    name - str with the stage name.
+    sortBy - str, how to sort the statistics, @see pstats.Stats.sort_stats.
+    limit - int, how many lines to print.
+    """
+    with _lock:
+        profile = _profiles.get(name)
+    if profile is None:
+        print "No profile for stage {}.".format(name)
+    else:
+        pstats.Stats(profile).sort_stats(sortBy).print_stats(limit)
+
+def saveProfile(name, fileName):
+    """ Save the cProfile statistics of the given stage for e.g. snakeviz. """
+    with _lock:
+        _profiles[name].dump_stats(fileName)
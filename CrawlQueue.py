@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Crawl the citation network with several cooperating workers - processes on
+one or more hosts, e.g. behind different VPN exits - instead of one process
+that stops for everybody when it gets a captcha. The workers share:
+    * an SQLite database with the queue of Articles whose citing Articles are
+      to be crawled (the tasks), all the Articles found so far, and the
+      citations between them,
+    * the directory with the cached pages (@see DownloadArticles.cachePage).
+
+Every worker leases a task for a while, crawls the citing Articles, and merges
+them into the database in one transaction. Articles are identified by their
+Title, Year and Authors, like Article.__eq__, so each one is stored only once
+no matter how many workers find it. Leases that aren't renewed expire, so
+the tasks of a worker that's died are picked up by the others. A worker that
+gets a captcha gives its task back and backs off, the others carry on.
+
+Example
+----------
+<tt>
+> queue = CrawlQueue('crawl.db', maxExpansions=100, trim=50)\n
+> queue.seed(DownloadArticles.findArticle(theArticle))\n
+</tt>
+and then, on every host:
+    python CrawlQueue.py crawl.db --cache /shared/cache --name vpn1
+Once done, queue.getArticles() and queue.getNetwork() give allArticles and the
+network like DownloadArticles.addCitingArticlesToNetwork builds them.
+
+@author: Alek
+@version: 1.0.3
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Give the task back when crawling it fails, instead of letting the worker die with the lease.
+                - 1.0.2 - Alek - Give up on the tasks that failed MAX_ATTEMPTS times.
+                - 1.0.3 - Alek - Renew the leases every half a lease time, not every 20 citing Articles.
+"""
+import os, time, socket, sqlite3, contextlib, argparse, traceback, cPickle, networkx
+import DownloadArticles, PageClassifier
+
+DEFAULT_LEASE_TIME = 1800. # Seconds a task is leased for; renewed every half of that while the task is being crawled.
+ERROR_RETRY_DELAY = 600. # Seconds before a task whose crawl failed can be leased again.
+MAX_ATTEMPTS = 3 # Failed crawls (errors or expired leases) after which a task is given up on.
+
+TASK_PENDING = 'pending'
+TASK_LEASED = 'leased'
+TASK_DONE = 'done'
+TASK_FAILED = 'failed' # Failed MAX_ATTEMPTS times, won't be tried again.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS articles (id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, article BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS edges (cited INTEGER NOT NULL, citing INTEGER NOT NULL, PRIMARY KEY (cited, citing));
+CREATE TABLE IF NOT EXISTS tasks (articleID INTEGER PRIMARY KEY, state TEXT NOT NULL, worker TEXT,
+    leaseExpiry REAL NOT NULL DEFAULT 0, notBefore REAL NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0); -- Failed crawls of the task, @see MAX_ATTEMPTS.
+CREATE INDEX IF NOT EXISTS tasksState ON tasks (state, articleID);
+"""
+
+def _toBytes(value):
+    """ Get a UTF-8 str out of a str or unicode. """
+    return value.encode('utf-8') if isinstance(value,unicode) else str(value)
+
+def articleKey(article):
+    """ Get the key that identifies an Article in the queue; Articles with the
+    same key are equal according to Article.__eq__.
+
+    Returns
+    ----------
+    str with the Title, Year and Authors.
+    """
+    return '\t'.join([_toBytes(article.Title), _toBytes(article.Year), '|'.join(_toBytes(a) for a in article.Authors)])
+
+class CrawlQueue(object):
+    """ Durable queue of crawl tasks and store of the crawled Articles and
+    citations, shared by all the workers through an SQLite file.
+    """
+    def __init__(self, fileName, maxExpansions=None, trim=None, leaseTime=DEFAULT_LEASE_TIME, clock=time):
+        """
+        Arguments
+        ----------
+        fileName - str with the SQLite database; created if it doesn't exist.
+            Has to be on a file system with working locks if the workers are
+            on different hosts.
+        maxExpansions - int or None, only the Articles with IDs below this
+            get their citing Articles crawled, like the first maxExpansions
+            Articles of allArticles in a single-process crawl; all of them
+            if None. Stored in the database when it's created, ignored after.
+        trim - int or None, how many citing Articles to get for every Article,
+            @see DownloadArticles.addCitingArticlesToNetwork. Stored like maxExpansions.
+        leaseTime - float, seconds after which a task that hasn't been
+            completed or renewed is given to another worker.
+        clock - object with a time() method, e.g. the time module.
+        """
+        self.fileName = fileName
+        self.leaseTime = leaseTime
+        self.clock = clock
+        # Autocommit, so that the transactions can be started with BEGIN IMMEDIATE and don't dead-lock.
+        self.connection = sqlite3.connect(fileName,timeout=60.,isolation_level=None)
+        self.connection.text_factory = str
+        with self._transaction() as cursor:
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    cursor.execute(statement)
+            cursor.executemany("INSERT OR IGNORE INTO settings VALUES (?,?)",[('maxExpansions',maxExpansions),('trim',trim)])
+            self.maxExpansions, self.trim = [cursor.execute("SELECT value FROM settings WHERE name=?",(name,)).fetchone()[0]
+                for name in ['maxExpansions','trim']]
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """ Lock the database for writing, and commit or roll back at the end. """
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+        except:
+            cursor.execute("ROLLBACK")
+            raise
+        else:
+            cursor.execute("COMMIT")
+
+    def _addArticle(self, cursor, article):
+        """ Store an Article unless there's an equal one already.
+
+        Returns
+        ----------
+        2-tuple with the int ID of the Article and a bool, True if it's new.
+        """
+        key = articleKey(article)
+        row = cursor.execute("SELECT id FROM articles WHERE key=?",(key,)).fetchone()
+        if row is not None:
+            return row[0], False
+        articleID = cursor.execute("SELECT COALESCE(MAX(id)+1,0) FROM articles").fetchone()[0] # IDs are the indices in allArticles.
+        cursor.execute("INSERT INTO articles VALUES (?,?,?)",(articleID,key,buffer(cPickle.dumps(article,cPickle.HIGHEST_PROTOCOL))))
+        return articleID, True
+
+    def seed(self, article):
+        """ Add an Article and the task to crawl its citing Articles.
+
+        Returns
+        ----------
+        int with the ID of the Article.
+        """
+        with self._transaction() as cursor:
+            articleID, isNew = self._addArticle(cursor,article)
+            cursor.execute("INSERT OR IGNORE INTO tasks (articleID, state) VALUES (?,?)",(articleID,TASK_PENDING))
+        return articleID
+
+    def leaseTask(self, worker):
+        """ Take the pending task with the lowest Article ID, or one whose
+        lease has expired. Expired leases count as failed attempts, and tasks
+        whose leases expired MAX_ATTEMPTS times are marked TASK_FAILED.
+
+        Arguments
+        ----------
+        worker - str with a name that identifies the worker.
+
+        Returns
+        ----------
+        2-tuple with the int ID of the Article and the Article, or None if
+            there are no tasks to do at the moment.
+        """
+        now = self.clock.time()
+        with self._transaction() as cursor:
+            # An expired lease is a failed attempt too, the worker probably died crawling the task.
+            cursor.execute("UPDATE tasks SET state=?, worker=NULL, attempts=attempts+1 WHERE state=? AND leaseExpiry<? AND attempts+1>=?",
+                (TASK_FAILED,TASK_LEASED,now,MAX_ATTEMPTS))
+            row = cursor.execute("SELECT articleID FROM tasks WHERE (state=? AND notBefore<=?) OR (state=? AND leaseExpiry<?) "
+                "ORDER BY articleID LIMIT 1",(TASK_PENDING,now,TASK_LEASED,now)).fetchone()
+            if row is None:
+                return None
+            cursor.execute("UPDATE tasks SET attempts=attempts+(state=?), state=?, worker=?, leaseExpiry=? WHERE articleID=?",
+                (TASK_LEASED,TASK_LEASED,worker,now+self.leaseTime,row[0]))
+            blob = cursor.execute("SELECT article FROM articles WHERE id=?",row).fetchone()[0]
+        return row[0], cPickle.loads(str(blob))
+
+    def renewLease(self, articleID, worker):
+        """ Extend the lease of a task the worker is still working on.
+
+        Returns
+        ----------
+        bool, False if the lease has been lost, e.g. it expired and another
+            worker took the task.
+        """
+        with self._transaction() as cursor:
+            cursor.execute("UPDATE tasks SET leaseExpiry=? WHERE articleID=? AND worker=? AND state=?",
+                (self.clock.time()+self.leaseTime,articleID,worker,TASK_LEASED))
+            return cursor.rowcount==1
+
+    def releaseTask(self, articleID, worker, delay=0., error=False):
+        """ Give a task back to the queue without completing it, e.g. because
+        the worker's been blocked.
+
+        Arguments
+        ----------
+        articleID - int with the ID of the Article of the task.
+        worker - str with the name of the worker.
+        delay - float, seconds before anybody can lease the task again.
+        error - bool, whether crawling the task failed. Such tasks are marked
+            TASK_FAILED after MAX_ATTEMPTS failures; captchas don't count.
+
+        Returns
+        ----------
+        bool, True if the task has been given up on.
+        """
+        with self._transaction() as cursor:
+            failures = int(error)
+            cursor.execute("UPDATE tasks SET state=CASE WHEN ? AND attempts+?>=? THEN ? ELSE ? END, attempts=attempts+?, "
+                "worker=NULL, notBefore=? WHERE articleID=? AND worker=? AND state=?",(failures,failures,MAX_ATTEMPTS,
+                TASK_FAILED,TASK_PENDING,failures,self.clock.time()+delay,articleID,worker,TASK_LEASED))
+            row = cursor.execute("SELECT state FROM tasks WHERE articleID=?",(articleID,)).fetchone()
+        return row is not None and row[0]==TASK_FAILED
+
+    def completeTask(self, articleID, citingArticles):
+        """ Merge the citing Articles of a task into the database and mark it
+        done. Articles that are already there aren't duplicated, and neither
+        are the citations, so completing a task twice (e.g. after its lease
+        expired and another worker took it) does no harm. New Articles that
+        are cited get their own tasks, up to maxExpansions.
+
+        Arguments
+        ----------
+        articleID - int with the ID of the Article of the task.
+        citingArticles - list of Articles citing it.
+
+        Returns
+        ----------
+        int with the no. new Articles.
+        """
+        noNew = 0
+        with self._transaction() as cursor:
+            for art in citingArticles:
+                citingID, isNew = self._addArticle(cursor,art)
+                cursor.execute("INSERT OR IGNORE INTO edges VALUES (?,?)",(articleID,citingID))
+                if isNew:
+                    noNew += 1
+                    if art.pubNoCitations > 0 and (self.maxExpansions is None or citingID < self.maxExpansions):
+                        cursor.execute("INSERT OR IGNORE INTO tasks (articleID, state) VALUES (?,?)",(citingID,TASK_PENDING))
+
+            # Record the no. citations at the time of the crawl, like addCitingArticlesToNetwork, @see DownloadArticles.refreshNetwork.
+            target = cPickle.loads(str(cursor.execute("SELECT article FROM articles WHERE id=?",(articleID,)).fetchone()[0]))
+            target.crawledNoCitations = target.pubNoCitations
+            cursor.execute("UPDATE articles SET article=? WHERE id=?",(buffer(cPickle.dumps(target,cPickle.HIGHEST_PROTOCOL)),articleID))
+            cursor.execute("UPDATE tasks SET state=?, worker=NULL WHERE articleID=?",(TASK_DONE,articleID))
+        return noNew
+
+    def isFinished(self):
+        """ Whether all the tasks are done or have failed, i.e. none are pending or leased. """
+        row = self.connection.execute("SELECT COUNT(*) FROM tasks WHERE state NOT IN (?,?)",(TASK_DONE,TASK_FAILED)).fetchone()
+        return row[0]==0
+
+    def getArticles(self):
+        """ Get all the Articles.
+
+        Returns
+        ----------
+        list of Articles, the index of every one is its ID.
+        """
+        return [cPickle.loads(str(row[0])) for row in self.connection.execute("SELECT article FROM articles ORDER BY id")]
+
+    def getNetwork(self):
+        """ Get the network of citations.
+
+        Returns
+        ----------
+        networkx.DiGraph with the IDs of the Articles as nodes and edges from
+            the cited Articles to the citing ones.
+        """
+        network = networkx.DiGraph()
+        network.add_nodes_from(xrange(self.connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]))
+        network.add_edges_from(self.connection.execute("SELECT cited, citing FROM edges"))
+        return network
+
+    def getStats(self):
+        """ Get the progress of the crawl.
+
+        Returns
+        ----------
+        dict with the no. articles, edges, and tasks in every state.
+        """
+        stats = {TASK_PENDING:0, TASK_LEASED:0, TASK_DONE:0, TASK_FAILED:0}
+        stats.update(self.connection.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall())
+        stats['articles'] = self.connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        stats['edges'] = self.connection.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+        return stats
+
+    def close(self):
+        self.connection.close()
+
+def crawlWorker(queue, cacheDir, worker=None, maxTasks=None, idleWait=10.):
+    """ Keep taking tasks from the queue and crawling the citing Articles
+    until all the tasks are done. Solving captchas is left to whoever runs
+    the worker - when blocked, the worker gives its task back and backs off,
+    @see PageClassifier.getBackoffTime, while the other workers carry on.
+
+    Arguments
+    ----------
+    queue - CrawlQueue.
+    cacheDir - str with the directory where the pages are cached, shared by
+        all the workers.
+    worker - str with the name of this worker, host name and process ID if None.
+    maxTasks - int or None, stop after completing this many tasks.
+    idleWait - float, seconds to wait before asking for a task again when
+        all the remaining ones are leased by the other workers.
+
+    Returns
+    ----------
+    dict with the no. tasks completed, new articles found, captchas got, and
+        errors (tasks given back because crawling them failed) by this worker.
+    """
+    worker = "{}-{}".format(socket.gethostname(),os.getpid()) if worker is None else worker
+    stats = {'tasks':0, 'articles':0, 'captchas':0, 'errors':0}
+    noFailures = 0 # Captchas in a row.
+    while maxTasks is None or stats['tasks'] < maxTasks:
+        if noFailures > 0: # Don't take a task and sit on it while we're blocked.
+            DownloadArticles.waitForNextRequest()
+        task = queue.leaseTask(worker)
+        if task is None:
+            if queue.isFinished():
+                break
+            time.sleep(idleWait) # The other workers may still add new tasks, or die and leave theirs.
+            continue
+
+        articleID, article = task
+        citingArticles = []
+        leaseLost = False
+        renewTime = queue.clock.time()+queue.leaseTime/2. # Renew well before the lease expires, however slow the pages are.
+        try:
+            for art in DownloadArticles.iterCitingArticles(article,cacheDir,queue.trim,solveCaptchas=False):
+                citingArticles.append(art)
+                if queue.clock.time() >= renewTime:
+                    if not queue.renewLease(articleID,worker): # Took too long, somebody else is doing it now.
+                        print "{} lost the lease of task {}.".format(worker,articleID)
+                        leaseLost = True
+                        break
+                    renewTime = queue.clock.time()+queue.leaseTime/2.
+        except PageClassifier.CaptchaError:
+            noFailures += 1
+            stats['captchas'] += 1
+            queue.releaseTask(articleID,worker) # The pages we've got are cached, another worker will carry on from there.
+            DownloadArticles.nextRequestTime = DownloadArticles.time.time()+PageClassifier.getBackoffTime(PageClassifier.PAGE_CAPTCHA,noFailures)
+            print "{} got a captcha, pausing.".format(worker)
+            continue
+        except Exception: # E.g. the network's down or a page can't be parsed - don't die holding the lease.
+            stats['errors'] += 1
+            print "{} couldn't crawl task {}:\n{}".format(worker,articleID,traceback.format_exc())
+            if queue.releaseTask(articleID,worker,ERROR_RETRY_DELAY,error=True): # Give it a rest, it might fail again straight away.
+                print "{} gave up on task {} after {} attempts.".format(worker,articleID,MAX_ATTEMPTS)
+            continue
+
+        noFailures = 0
+        if leaseLost:
+            continue
+        stats['articles'] += queue.completeTask(articleID,citingArticles)
+        stats['tasks'] += 1
+    return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a worker of a cooperative crawl of Google Scholar.")
+    parser.add_argument('queueFile', help="SQLite database with the queue, created if it doesn't exist.")
+    parser.add_argument('--cache', default=DownloadArticles.CACHE_DIR, help="Directory with the cached pages, shared by all the workers.")
+    parser.add_argument('--name', default=None, help="Name of this worker, host name and process ID by default.")
+    parser.add_argument('--max-tasks', type=int, default=None, help="Stop after this many tasks.")
+    parser.add_argument('--status', action='store_true', help="Only print the progress of the crawl.")
+    args = parser.parse_args()
+    queue = CrawlQueue(args.queueFile)
+    if not args.status:
+        print crawlWorker(queue, args.cache, args.name, args.max_tasks)
+    print queue.getStats()
+    queue.close()
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Run the whole crawl - findArticle, getCitingArticles and addCitingArticlesToNetwork
+from DownloadArticles - against a FakeScholarServer instead of Google Scholar.
+All the sleeping between requests happens on a VirtualClock, so a crawl that
+would take days finishes in seconds and can be repeated exactly. Use it to
+benchmark the crawl throughput against how often we get blocked, e.g. for
+different backoff settings in PageClassifier or different rate limit rules,
+how many requests refreshing a crawled network takes, or how a cooperative
+crawl with several workers scales.
+
+@author: Alek
+@version: 1.0.3
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Added simulateRefresh.
+                - 1.0.2 - Alek - Added simulateCooperativeCrawl.
+                - 1.0.3 - Alek - The simulated pages are bytes, like DownloadArticles.getSourceWithFirefox returns.
+"""
+import os, time, tempfile, shutil, urllib2, contextlib, multiprocessing, networkx
+import Article, DownloadArticles, FakeScholarServer, CrawlMetrics, CrawlQueue
+
+SCHOLAR_URL = "https://scholar.google.com" # getCitingArticles builds the URLs with this, redirect them to the fake server.
+
+@contextlib.contextmanager
+def simulatedScholar(server, cacheDir, latency=1., captchaSolveTime=120.):
+    """ Temporarily point DownloadArticles at a FakeScholarServer. Pages are
+    fetched over HTTP from the server, and sleeping as well as the time spent
+    on requests and on solving captchas advance the server's VirtualClock.
+
+    Arguments
+    ----------
+    server - running FakeScholarServer.
+    cacheDir - str with the directory where the pages will be cached, should
+        be empty for a clean simulation.
+    latency - float, seconds of virtual time every request takes.
+    captchaSolveTime - float, seconds of virtual time it takes a human to solve
+        a captcha.
+    """
+    clock = server.scholar.clock
+
+    @CrawlMetrics.timed('fetch')
+    def getSource(url, cacheName=None):
+        """ Replaces DownloadArticles.getSourceWithFirefox. """
+        clock.sleep(latency)
+        return urllib2.urlopen(url.replace(SCHOLAR_URL,server.url,1)).read()
+
+    @CrawlMetrics.timed('captcha')
+    def solveCaptcha(url):
+        """ Replaces DownloadArticles.solveCaptcha. """
+        clock.sleep(captchaSolveTime)
+        server.scholar.solveCaptcha()
+        return getSource(url)
+
+    original = (DownloadArticles.getSourceWithFirefox, DownloadArticles.solveCaptcha, DownloadArticles.time,
+        DownloadArticles.CACHE_DIR, DownloadArticles.scholarSearchEngine.SEARCH_HOST, DownloadArticles.nextRequestTime)
+    DownloadArticles.getSourceWithFirefox = getSource
+    DownloadArticles.solveCaptcha = solveCaptcha
+    DownloadArticles.time = clock # Has a sleep() just like the time module.
+    DownloadArticles.CACHE_DIR = cacheDir
+    DownloadArticles.scholarSearchEngine.SEARCH_HOST = server.host
+    DownloadArticles.nextRequestTime = None # It's in real time, not the virtual time.
+    try:
+        yield clock
+    finally:
+        DownloadArticles.getSourceWithFirefox, DownloadArticles.solveCaptcha, DownloadArticles.time,\
+            DownloadArticles.CACHE_DIR, DownloadArticles.scholarSearchEngine.SEARCH_HOST, DownloadArticles.nextRequestTime = original
+
+def _crawl(graph, noExpansions, trim):
+    """ Find the most cited article of the graph and keep adding the articles
+    that cite the articles in the network. Call within simulatedScholar.
+
+    Returns
+    ----------
+    2-tuple with the list of Articles and the networkx.DiGraph of citations.
+    """
+    root = max(graph, key=lambda art: len(art['CitedBy'])) # Something popular to start from.
+    target = Article.Article(root['Title'],root['Authors'],root['Year'],root['Journal'])
+    allArticles = [DownloadArticles.findArticle(target)]
+    network = networkx.DiGraph()
+    network.add_node(0)
+    for targetIdx in range(noExpansions):
+        if targetIdx >= len(allArticles): # Nothing more to expand.
+            break
+        if allArticles[targetIdx].pubNoCitations > 0:
+            DownloadArticles.addCitingArticlesToNetwork(allArticles,targetIdx,network,trim)
+    return allArticles, network
+
+def simulateCrawl(noArticles=5000, noExpansions=20, trim=None, rules=None, captchaProbability=0.,
+                  latency=1., captchaSolveTime=120., seed=0):
+    """ Generate a citation graph, serve it with a FakeScholarServer and crawl
+    it like the __main__ of DownloadArticles does: find the most cited article
+    and keep adding the articles that cite the articles in the network.
+
+    Arguments
+    ----------
+    noArticles - int, how many articles in the synthetic citation graph.
+    noExpansions - int, for how many Articles to get the citing Articles.
+    trim - int or None, @see DownloadArticles.addCitingArticlesToNetwork.
+    rules - list of FakeScholarServer.RateLimitRules, @see FakeScholarServer.FakeScholar.
+    captchaProbability - float, chance of getting a captcha on any request.
+    latency, captchaSolveTime - @see simulatedScholar.
+    seed - int, seed for the graph and the captchas.
+
+    Returns
+    ----------
+    dict with the statistics of the crawl:
+        articles - no. Articles in the network,
+        edges - no. citations in the network,
+        requests - no. requests the server received,
+        captchas - no. captcha pages it served,
+        blockRate - fraction of the requests that got a captcha,
+        virtualHours - how long the crawl would have taken,
+        articlesPerHour - crawl throughput in virtual time,
+        realSeconds - how long the simulation took.
+    """
+    graph = FakeScholarServer.generateCitationGraph(noArticles,seed=seed)
+    scholar = FakeScholarServer.FakeScholar(graph,rules=rules,captchaProbability=captchaProbability,seed=seed)
+    server = FakeScholarServer.FakeScholarServer(scholar)
+    server.start()
+    cacheDir = tempfile.mkdtemp()
+    realStart = time.time()
+    try:
+        with simulatedScholar(server,cacheDir,latency,captchaSolveTime) as clock:
+            allArticles, network = _crawl(graph,noExpansions,trim)
+            virtualSeconds = clock.time()
+    finally:
+        server.stop()
+        shutil.rmtree(cacheDir)
+
+    return {'articles':len(allArticles), 'edges':network.number_of_edges(),
+        'requests':scholar.stats['requests'], 'captchas':scholar.stats['captcha'],
+        'blockRate':scholar.stats['captcha']/float(max(1,scholar.stats['requests'])),
+        'virtualHours':virtualSeconds/3600., 'articlesPerHour':len(allArticles)/max(1e-9,virtualSeconds/3600.),
+        'realSeconds':time.time()-realStart}
+
+def simulateRefresh(noArticles=5000, noExpansions=20, noNewArticles=200, lookUp=True, seed=0):
+    """ Crawl a synthetic citation graph like simulateCrawl, publish some new
+    articles that cite the old ones, and bring the network up to date with
+    DownloadArticles.refreshNetwork. Then count how many requests re-crawling
+    the citing articles of every crawled Article would have taken instead.
+    The server doesn't rate-limit the requests, only the numbers matter here.
+
+    Arguments
+    ----------
+    noArticles - int, how many articles in the synthetic citation graph.
+    noExpansions - int, for how many Articles to get the citing Articles.
+    noNewArticles - int, how many articles to publish between the crawl and
+        the refresh.
+    lookUp - bool, @see DownloadArticles.refreshNetwork.
+    seed - int, seed for the graph.
+
+    Returns
+    ----------
+    dict with the statistics:
+        crawlRequests - no. requests of the initial crawl,
+        refreshRequests - no. requests of the refresh,
+        recrawlRequests - no. requests of re-crawling all the crawled Articles,
+        newCitations - no. citations of the crawled Articles by the new articles,
+        missedCitations - how many of those aren't in the refreshed network,
+        and the statistics returned by refreshNetwork.
+    """
+    graph = FakeScholarServer.generateCitationGraph(noArticles,seed=seed)
+    scholar = FakeScholarServer.FakeScholar(graph,rules=[],seed=seed)
+    server = FakeScholarServer.FakeScholarServer(scholar)
+    server.start()
+    cacheDir = tempfile.mkdtemp()
+    try:
+        with simulatedScholar(server,cacheDir):
+            allArticles, network = _crawl(graph,noExpansions,None)
+            stats = {'crawlRequests':scholar.stats['requests']}
+            
+            scholar.publish(noNewArticles,max(art['Year'] for art in graph)+1)
+            before = scholar.stats['requests']
+            stats.update(DownloadArticles.refreshNetwork(allArticles,network,lookUp))
+            stats['refreshRequests'] = scholar.stats['requests']-before
+            
+            # Check that every new citation of the crawled Articles has been found. The IDs are at the ends of the titles.
+            ids = [int(art.Title.split()[-1]) for art in allArticles]
+            stats['newCitations'] = stats['missedCitations'] = 0
+            for targetIdx in network.nodes():
+                if getattr(allArticles[targetIdx],'crawledNoCitations',None) is None:
+                    continue
+                citing = set(ids[i] for i in network.successors(targetIdx))
+                for i in graph[ids[targetIdx]]['CitedBy']:
+                    if i >= noArticles: # A new one.
+                        stats['newCitations'] += 1
+                        stats['missedCitations'] += i not in citing
+            
+            before = scholar.stats['requests']
+            for art in allArticles:
+                if getattr(art,'crawledNoCitations',None) is not None:
+                    for citingArt in DownloadArticles.iterCitingArticles(art,cacheDir,readCache=False):
+                        pass
+            stats['recrawlRequests'] = scholar.stats['requests']-before
+    finally:
+        server.stop()
+        shutil.rmtree(cacheDir)
+    return stats
+
+def _cooperativeWorker(server, cacheDir, queueFile, worker, latency, results):
+    """ Run a CrawlQueue worker in a separate process, put its statistics and
+    how much virtual time it took in the results. """
+    with simulatedScholar(server,cacheDir,latency) as clock: # Every process advances its own copy of the clock.
+        queue = CrawlQueue.CrawlQueue(queueFile)
+        stats = CrawlQueue.crawlWorker(queue,cacheDir,worker,idleWait=0.05)
+        queue.close()
+        stats['virtualSeconds'] = clock.time()
+    results.put(stats)
+
+def simulateCooperativeCrawl(noWorkers=4, noArticles=5000, noExpansions=20, trim=None, latency=1., seed=0):
+    """ Crawl a synthetic citation graph with several CrawlQueue workers, each
+    in its own process, sharing the queue and the page cache. Every worker has
+    its own VirtualClock, like it had its own IP address, so the crawl takes
+    as long as the slowest worker; the server doesn't rate-limit the requests.
+
+    Arguments
+    ----------
+    noWorkers - int, how many worker processes.
+    noArticles, noExpansions, trim, latency, seed - @see simulateCrawl.
+
+    Returns
+    ----------
+    dict with the statistics of the crawl:
+        articles - no. Articles in the network,
+        edges - no. citations in the network,
+        requests - no. requests the server received,
+        tasks - no. tasks completed by every worker,
+        virtualHours - how long the crawl would have taken,
+        articlesPerHour - crawl throughput in virtual time,
+        realSeconds - how long the simulation took.
+    """
+    graph = FakeScholarServer.generateCitationGraph(noArticles,seed=seed)
+    scholar = FakeScholarServer.FakeScholar(graph,rules=[],seed=seed)
+    server = FakeScholarServer.FakeScholarServer(scholar)
+    server.start()
+    cacheDir = tempfile.mkdtemp()
+    queueFile = os.path.join(cacheDir,'.queue.db') # Hidden, not to look like a cached page.
+    realStart = time.time()
+    try:
+        with simulatedScholar(server,cacheDir,latency):
+            root = max(graph, key=lambda art: len(art['CitedBy'])) # Same start as _crawl.
+            queue = CrawlQueue.CrawlQueue(queueFile,noExpansions,trim)
+            queue.seed(DownloadArticles.findArticle(Article.Article(root['Title'],root['Authors'],root['Year'],root['Journal'])))
+
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_cooperativeWorker,args=(server,cacheDir,queueFile,'worker{}'.format(i),latency,results))
+            for i in range(noWorkers)]
+        for worker in workers:
+            worker.start()
+        workerStats = [results.get() for worker in workers]
+        for worker in workers:
+            worker.join()
+        stats = queue.getStats()
+        queue.close()
+    finally:
+        server.stop()
+        shutil.rmtree(cacheDir)
+
+    virtualSeconds = max(s['virtualSeconds'] for s in workerStats)
+    return {'articles':stats['articles'], 'edges':stats['edges'], 'requests':scholar.stats['requests'],
+        'tasks':sorted(s['tasks'] for s in workerStats), 'virtualHours':virtualSeconds/3600.,
+        'articlesPerHour':stats['articles']/max(1e-9,virtualSeconds/3600.), 'realSeconds':time.time()-realStart}
+
+if __name__ == '__main__':
+    " Compare how the crawl does against stricter and more lenient rate limits. "
+    for maxRequests in [3, 5, 10]:
+        stats = simulateCrawl(noArticles=2000, noExpansions=10, trim=100,
+            rules=[FakeScholarServer.RateLimitRule(maxRequests,600.,3600.)])
+        print "Max {} requests per 10 min: {}".format(maxRequests,stats)
+
+    " How much cheaper is refreshing than re-crawling. "
+    print "Refresh: {}".format(simulateRefresh(noArticles=5000, noExpansions=50, noNewArticles=200))
+
+    " How the crawl scales with the no. cooperating workers. "
+    for noWorkers in [1, 2, 4, 8]:
+        print "{} workers: {}".format(noWorkers,simulateCooperativeCrawl(noWorkers, noArticles=5000, noExpansions=40, trim=100))
@@ -7,7 +7,7 @@ Created on Sun Apr 19 20:46:55 2015
 @author: alek
 """
 
-import os, requests, re, difflib, time, numpy, subprocess, networkx, matplotlib.pyplot
+import os, re, difflib, time, numpy, subprocess, networkx, matplotlib.pyplot, tempfile
 import nltk, string, sklearn.metrics, sklearn.cluster
 try:
     from selenium import webdriver
@@ -15,11 +15,15 @@ except ImportError:
     print "Install Selenium using sudo pip install selenium. If you aren't running Unix and can't use pip then you should abandon Windows."
 
 from nltk.util import ngrams
-import Article, GoogleScholarSearch
+import Article, GoogleScholarSearch, PageClassifier, CrawlMetrics, QueryCache, RelatedArticles, FetchBackends, TextResources
 
 CACHE_DIR = '/home/alek/Desktop/cache' # Will store the page sources here.
 
-scholarSearchEngine = GoogleScholarSearch.GoogleScholarSearchEngine() # Convenient to search through Google Scholar.
+httpBackend = FetchBackends.HTTPBackend() # Gets the CiteULike pages and the Scholar search results.
+browserBackend = FetchBackends.BrowserBackend() # Gets the pages of citing articles, Scholar doesn't like scripts there.
+queryCache = QueryCache.QueryCache() # Don't send the same queries again, e.g. when seeding from a bibliography. Give it a fileName to keep the results between runs.
+scholarSearchEngine = GoogleScholarSearch.GoogleScholarSearchEngine(queryCache,httpBackend) # Convenient to search through Google Scholar.
+nextRequestTime = None # Don't send the next request to Google Scholar before this time, @see iterCitingArticles.
 
 """
     ---------------------------------------------------------------------------
@@ -67,6 +71,18 @@ TitlePatternGoogle = re.compile('nossl=1">[\s\w\d\:\-\,\.\;\&\#]+</a></h3>') # J
 YearPatternGoogle = re.compile('\,\s\d{4}[\s\-<]*')
 ArticleInfoPatternGoogle = re.compile('[\.\,\-\s\w]+\,\s\d{4}[\s\-<]*') # Will find the list of authors, journal, and year.
 CitedByNumberPattern = re.compile('Cited\sby\s\d+') # How many times the given article has been cited.
+TITLE_SIMILARITY = 0.9 # Min. difflib ratio of the Titles of Articles deemed the same when their cluster IDs aren't known, @see isSameArticle.
+
+def useFetchBackend(backend):
+    """ Get all the pages with the given backend, e.g. a FetchBackends.ReplayBackend
+    to replay a recorded crawl, or a FetchBackends.RecordingBackend to record one.
+    
+    Arguments
+    ----------
+    backend - FetchBackends.FetchBackend.
+    """
+    global httpBackend, browserBackend
+    httpBackend = browserBackend = scholarSearchEngine.backend = backend
 
 def getArticlesCiteULike(authors=[], keywords=[], yearStart=1800, yearEnd=3000, title="", isbn="none", pageLimit=2):
     """ Find scientific articles that match given criteria on-line.
@@ -87,6 +103,10 @@ def getArticlesCiteULike(authors=[], keywords=[], yearStart=1800, yearEnd=3000,
     Returns
     ----------
     A list of Articles @see Article.
+    
+    Raises
+    ----------
+    IOError when CiteULike can't be reached or returns an error.
     """
     pageNo = 1 # Number of the page with results.
     
@@ -122,7 +142,9 @@ def getArticlesCiteULike(authors=[], keywords=[], yearStart=1800, yearEnd=3000,
             searchURL += "+isbn%3A{}".format(isbn)
 
         " Perform the actual search. "
-        the_page = requests.get(searchURL).text # Get the text version of the website. Use requests not urllib2 because the page will be too large for it.
+        resp = httpBackend.fetch(searchURL,followRedirects=True)
+        resp.raiseForStatus() # Don't parse error pages as if there were no articles.
+        the_page = resp.text # Get the text version of the website.
         
         lines = the_page.split("\n") # Parsing lines is easier than coming up with regexes to get the info about all the articles from the_page. Besides not every article will have all the information.
         
@@ -179,6 +201,7 @@ def getArticlesCiteULike(authors=[], keywords=[], yearStart=1800, yearEnd=3000,
         
     return articles
 
+@CrawlMetrics.timed('fetch')
 def getSourceWithFirefox(url, cacheName=None):
     """ Get the string with the source of the website at the URL. If desired,
     will cache the source in a text file.
@@ -191,17 +214,35 @@ def getSourceWithFirefox(url, cacheName=None):
         
     Returns
     ----------
-    str with the source of the website.
+    str with the bytes of the source of the website.
     """
-    firefoxDriver = webdriver.Firefox() # Open Firefox.
-    
-    firefoxDriver.get(url) # Go to the page.
-    src = firefoxDriver.page_source # Get source because.
+    return browserBackend.fetch(url).body # Doesn't have to be a browser, @see useFetchBackend.
+
+@CrawlMetrics.timed('captcha')
+def solveCaptcha(url):
+    """ Ask the user to show Google that they're not a robot and get the source
+    of the website at the URL once they have.
     
+    Argumets
+    ----------
+    url - str with a full URL of a website that shows a captcha.
+        
+    Returns
+    ----------
+    str with the bytes of the source of the website after the captcha has been solved.
+    """
+    # Use the webdriver; doing it through browsers doesn't work.
+    firefoxDriver = webdriver.Firefox()
+    firefoxDriver.get(url)
+    # Let the user know they have to convince Google they're a human.
+    proc = subprocess.Popen(['zenity', '--info', '--text=Please show Google that you are not a robot and click OK to continue downloading articles.\n\nTry to change VPN as well.'])
+    proc.wait() # Wait for the user to click OK having shown that they're human.
+    src = firefoxDriver.page_source.encode('utf-8') # Get the source with the check passed (actual articles are here), the page says it's UTF-8.
     firefoxDriver.close()
     
     return src
 
+@CrawlMetrics.timed('parse')
 def getArticlesFromSource(source, searchTerms):
     """ Parses a given Google Scholar results page and returns a list of 
         Articles that are displayed there. This can be used to find citing or 
@@ -230,7 +271,8 @@ def getArticlesFromSource(source, searchTerms):
 
         Arguments
         ----------
-        @param source - ASCII str, HTML source of the page from which to extract the Articles.
+        @param source - str with the bytes of the HTML source of the page from which
+            to extract the Articles, lxml works out the encoding; unicode works too.
         @param searchTerms - list of strings that we'll search for.
         
         Returns
@@ -240,6 +282,7 @@ def getArticlesFromSource(source, searchTerms):
     """
     soup = GoogleScholarSearch.BeautifulSoup(source, "lxml")
     results = [] # Store the articles here.
+    authorLines = [] # Green lines with the authors, journals and years of the Articles.
     
     for record in soup.find_all('div',{'class': 'gs_r'}):#soup('p', {'class': 'g'}):
         allAs = record.find_all('a') # All <a></a> fields corresponding to this article.
@@ -285,27 +328,7 @@ def getArticlesFromSource(source, searchTerms):
             if len(m)>0:
                 authorPart = m[0]
 
-        " Get journal name, publication year, and authors' list. "
-        # Assume that the fields are delimited by ' - ', the first entry will be the
-        # list of authors, the last entry is the journal URL. We also have journal name and year there.
-        try: # Sometimes there simply is no year associated to some entires.
-            pubJournalYear = int(GoogleScholarSearch.IntegerPattern.findall(authorPart)[0]) # We might get other integers, but not preceded by whitespaces.
-        except IndexError: # Not much I can do about it...
-            pubJournalYear=9999
-        
-        idx_start = authorPart.find(' - ') # Here the authors' list ends.
-        idx_end = authorPart.rfind(' - ') # Here the journal's public URL starts.
-        idx_jrnlNameEnd = authorPart.rfind(',') # After the journal name.
-        
-        pubJournalName = authorPart[idx_start:idx_jrnlNameEnd].lstrip().lstrip("-")
-        
-        pubAuthors = authorPart[:idx_start]                
-        pubJournalURL = authorPart[idx_end + 3:]
-        # If (only one ' - ' is found) and (the end bit contains '\d\d\d\d')
-        # then the last bit is journal year instead of journal URL
-        if pubJournalYear=='' and re.search('\d\d\d\d', pubJournalURL)!=None:
-            pubJournalYear = pubJournalURL
-            pubJournalURL = 'Unavailable'
+        authorLines.append(authorPart) # Parsed together with the other Articles' ones after the loop.
         
         " Get the abstract. "
         abstractDiv = record.find('div',attrs={'class':'gs_rs'}) # Abstract info sits here.
@@ -315,7 +338,7 @@ def getArticlesFromSource(source, searchTerms):
             pubAbstract = "Abstract unavailable" # Can't conjure it.
         
         " Save the results. "
-        results.append( Article.Article(pubTitle.encode('utf-8'),map(lambda x: x.encode('utf-8'),pubAuthors.split(',')),pubJournalYear,pubJournalName.encode('utf-8'),tagList=searchTerms,abstract=pubAbstract.encode('utf-8')) )
+        results.append( Article.Article(pubTitle.encode('utf-8'),[],GoogleScholarSearch.NO_YEAR,'',tagList=searchTerms,abstract=pubAbstract.encode('utf-8')) )
         # All the URLs.
         results[-1].fullURL = fullURL
         results[-1].pubURL = pubURL
@@ -323,12 +346,47 @@ def getArticlesFromSource(source, searchTerms):
         results[-1].relatedArticlesURL = relatedArticlesURL
         # This might be useful to something, e.g. seeing whcih publications have the most impact.
         results[-1].pubNoCitations = pubNoCitations
-            
+    GoogleScholarSearch.setAuthorLines(results,authorLines)
+    
+    CrawlMetrics.increment('articlesParsed',len(results))
     return results # If everything's gone smoothly...
 
-def getCitingArticles(targetArticle,cacheDir,trim=None):
-    """ Get all the articles citing an Article. Try to use cached websites
-    and cache them on the way.
+def cachePage(cacheName, src):
+    """ Save the source of a page in the cache. It's written to a temporary
+    file first and then renamed, so that other processes sharing the cache
+    (@see CrawlQueue) never read half of a page.
+    
+    Arguments
+    ----------
+    cacheName - str with the path to the cache file.
+    src - str with the bytes of the page source.
+    """
+    handle, tempName = tempfile.mkstemp(dir=os.path.dirname(cacheName) or '.', prefix='.') # Hidden, so ReparseCache skips it.
+    with os.fdopen(handle,"w") as cacheFile:
+        cacheFile.write(src)
+    os.rename(tempName,cacheName) # Atomic, replaces what's been there.
+
+def waitForNextRequest():
+    """ Sleep until nextRequestTime, so that the requests aren't sent to Google
+    Scholar too quickly. Returns straight away if it's already passed, or if
+    the pages don't come from Google Scholar, e.g. are replayed. """
+    if nextRequestTime is not None and browserBackend.isRemote:
+        dt = nextRequestTime-time.time()
+        if dt > 0:
+            print "\tSleeping for {:.0f} seconds.".format(dt)
+            time.sleep(dt)
+
+def iterCitingArticles(targetArticle,cacheDir,trim=None,sortByDate=False,readCache=True,solveCaptchas=True):
+    """ Get the articles citing an Article one at a time, as soon as the page
+    of results they're on has been parsed. Try to use cached websites and cache
+    them on the way. No more pages are fetched once trim Articles have been
+    yielded or the caller stops iterating.
+    
+    The wait between the requests is only done just before the next page is
+    fetched, so whatever the caller does with the Articles in the meantime
+    counts towards the wait, and nothing is waited for after the last page.
+    The time of the next request is kept in the module-level nextRequestTime,
+    so that the wait also applies between the calls for different Articles.
     
     Arguments
     ----------
@@ -338,12 +396,22 @@ def getCitingArticles(targetArticle,cacheDir,trim=None):
         will be saved to and read from.
     trim - int or None, whether to limit the number of Articles that will be
         retrieved and to how many. If None, all the Articles will be retrieved.
+    sortByDate - bool, whether to get the most recent Articles first instead
+        of the most relevant ones, @see refreshNetwork.
+    readCache - bool, whether to use the cached pages. The fetched pages are
+        cached either way, so False gets the current pages and updates the cache.
+    solveCaptchas - bool, whether to ask the user to solve the captchas, or
+        to give up straight away, e.g. to let another worker carry on.
+    
+    Yields
+    ----------
+    Articles, in the order in which Google Scholar displays them.
     
-    Returns
+    Raises
     ----------
-    A list of Articles.
+    PageClassifier.CaptchaError if got a captcha and solveCaptchas is False.
     """
-    citingArticles = [] # Collect citing articles from all the result pages.
+    global nextRequestTime
     citingArticlesURLParts = targetArticle.citingArticlesURL.split("?") # Need to split this to be able to display different result pages.
 
     # Can only display 50 pages with 20 results per page - might not be ableto get all citations.
@@ -352,54 +420,86 @@ def getCitingArticles(targetArticle,cacheDir,trim=None):
     else: # For completness' sake, see if trim is definitely smaller than available no. citations.
         noArticlesInSearch=min(50*20,targetArticle.pubNoCitations,trim)
     
+    noYielded = 0 # How many Articles we've given to the caller.
+    noFailures = 0 # How many captcha or error pages we've got in a row, decides how long to back off.
     for startArticleIndex in range(0,noArticlesInSearch,20): # The first article to be displayed on the Scholar page. Go every 20 articles to limit the number of requests we send.
         url = "https://scholar.google.com"+citingArticlesURLParts[0]+"?"+\
             "start={}&num=20&".format(startArticleIndex)+\
             citingArticlesURLParts[1].replace("as_sdt=2005","as_sdt=0,5")# as_sdt=0,5 should only return articles, but it returns everything?
+        if sortByDate:
+            url += "&scisbd=1" # Newest first.
+        cacheName = os.path.join(cacheDir,url.lstrip('https://scholar.google.com/scholar?'))
 
         try: # Try to get the cached source in the first instance.
-            with open(os.path.join(cacheDir,url.lstrip('https://scholar.google.com/scholar?')),"r") as cacheFile:
-                src=cacheFile.read()
-                temp = getArticlesFromSource(src,targetArticle.Keywords)
+            if not readCache:
+                raise IOError("Not reading the cache.")
+            with CrawlMetrics.stage('cacheLookup'):
+                with PageClassifier.openCachedPage(cacheName) as page:
+                    pageClass = PageClassifier.classifyPage(page)
+                    src = page[:] if pageClass==PageClassifier.PAGE_RESULTS else '' # Only read the pages we'll parse.
+            CrawlMetrics.increment('cacheHits')
         except IOError: # No cache file - retrieve source with Firefox.
-            src = getSourceWithFirefox(url) # Get the source of the website.
-            src = src.encode('ascii', 'ignore') # Convert src from unicode to something, which can be written to a file.
-            temp = getArticlesFromSource(src,targetArticle.Keywords)
-            if not "Please show you\'re not a robot" in src and not len(temp)==0: # Don't cache robot verification or empty pages.
-                with open(os.path.join(cacheDir,url.lstrip('https://scholar.google.com/scholar?')),"w") as cacheFile:
-                    cacheFile.write(src)
-                    dt = 60+numpy.random.randint(0,60,1)[0]
-                    print "\tSleeping for {} seconds.".format(dt)
-                    time.sleep(dt) # Wait a while to not send requests too quickly
+            CrawlMetrics.increment('cacheMisses')
+            waitForNextRequest() # Wait a while to not send requests too quickly
+            src = getSourceWithFirefox(url) # Get the source of the website, bytes can be written to a file and parsed as they are.
+            pageClass = PageClassifier.classifyPage(src) # Decide what to do before spending time on parsing.
+            CrawlMetrics.increment('pages_'+pageClass)
+            if pageClass==PageClassifier.PAGE_RESULTS: # Don't cache robot verification or empty pages.
+                cachePage(cacheName,src)
             
-        if not "Please show you\'re not a robot" in src: # Searching still works - get the citing articles.
-            citingArticles.extend(temp) # Add articles from this page to the results.
-            print "Start IDX: {}, no. articles: {}".format(startArticleIndex,len(temp))
-
-        else: # Require manual intervention to show I'm not a robot.
-            # Use the webdriver; doing it through browsers doesn't work.
-            firefoxDriver = webdriver.Firefox()
-            firefoxDriver.get(url)
-            # Let the user know they have to convince Google they're a human.
-            proc = subprocess.Popen(['zenity', '--info', '--text=Please show Google that you are not a robot and click OK to continue downloading articles.\n\nTry to change VPN as well.'])
-            proc.wait() # Wait for the user to click OK having shown that they're human.
-            src = firefoxDriver.page_source # Get the source with the check passed (actual articles are here).
-            firefoxDriver.close()
+            if pageClass in (PageClassifier.PAGE_CAPTCHA,PageClassifier.PAGE_ERROR):
+                noFailures += 1
+            else:
+                noFailures = 0
+            if pageClass!=PageClassifier.PAGE_CAPTCHA: # Captchas are dealt with by the user below.
+                nextRequestTime = time.time()+PageClassifier.getBackoffTime(pageClass,noFailures)
             
-            # Get the actual source of the website for this batch of articles , cache it and retrieve Articles from it.
-            src = src.encode('ascii', 'ignore')
-            with open(os.path.join(cacheDir,url.lstrip('https://scholar.google.com/scholar?')),"w") as cacheFile:
-                cacheFile.write(src)
-            temp = getArticlesFromSource(src,targetArticle.Keywords)
-            print "Start IDX: {}, no. articles: {}".format(startArticleIndex,len(temp))
-            citingArticles.extend(temp)
-    
-    if trim is None: # Return all the Articles.
-        return citingArticles
-    else: # if trim<20 we got all the 20 articles from the first page of results.
-        return citingArticles[:trim]
-
-def findArticle(targetArticle):
+        if pageClass==PageClassifier.PAGE_EMPTY: # No more results, don't send requests for the following pages.
+            print "Start IDX: {}, no more articles.".format(startArticleIndex)
+            return
+        
+        elif pageClass==PageClassifier.PAGE_ERROR: # Will back off, try the next page.
+            print "Start IDX: {}, couldn't get the page.".format(startArticleIndex)
+            continue
+
+        elif pageClass==PageClassifier.PAGE_CAPTCHA: # Require manual intervention to show I'm not a robot.
+            if not solveCaptchas:
+                raise PageClassifier.CaptchaError("Got a captcha page with URL: {}".format(url))
+            src = solveCaptcha(url)
+            
+            # Get the actual source of the website for this batch of articles and cache it.
+            cachePage(cacheName,src)
+            browserBackend.record(FetchBackends.Response(url,200,src)) # Replay the page with the articles, not the captcha.
+        
+        # Searching works - get the citing articles.
+        temp = getArticlesFromSource(src,targetArticle.Keywords)
+        print "Start IDX: {}, no. articles: {}".format(startArticleIndex,len(temp))
+        for art in temp:
+            yield art
+            noYielded += 1
+            if trim is not None and noYielded>=trim: # if trim<20 we got all the 20 articles from the first page of results.
+                return
+
+def getCitingArticles(targetArticle,cacheDir,trim=None):
+    """ Get all the articles citing an Article. Try to use cached websites
+    and cache them on the way, @see iterCitingArticles.
+    
+    Arguments
+    ----------
+    targetArticle - and instance of an Article, will get the Articles
+        that cite it.
+    cacheDir - string with the directory where the source of the parsed sites
+        will be saved to and read from.
+    trim - int or None, whether to limit the number of Articles that will be
+        retrieved and to how many. If None, all the Articles will be retrieved.
+    
+    Returns
+    ----------
+    A list of Articles.
+    """
+    return list(iterCitingArticles(targetArticle,cacheDir,trim))
+
+def findArticle(targetArticle,readCache=True):
     """ Find an Article on Google Scholar that resembles the input Article
     instance.
     
@@ -408,6 +508,8 @@ def findArticle(targetArticle):
     An instance of an Article that has as many fields filled in as possible.
         Will use the Year, Title and Authors attributes to find this Article
         on Googgle.
+    readCache - bool, whether the results of the search can come from the
+        queryCache, @see GoogleScholarSearch.GoogleScholarSearchEngine.getArticlesFromPage.
     
     Returns
     ----------
@@ -415,21 +517,19 @@ def findArticle(targetArticle):
     
     Raises
     ----------
-    RuntimeError if cannot access Google due to catpcha restrictions.
+    PageClassifier.CaptchaError if cannot access Google due to catpcha restrictions.
+    RuntimeError if the search returned no articles.
     """
     # Get all the articles from the page when we look for the title of theArticle of interest.
     # as_sdt=0,5 should only return articles, but it returns everything?
     searchURL = "/scholar?hl=en&as_sdt=0,5&q=" # Now we're searching for articles only (as_sdt=0,5).
     searchURL += targetArticle.Title.replace(" ","%20") # Search by title. We can't have space in there.
     try: # Sometimes captcha might kick in here.
-        papers = scholarSearchEngine.getArticlesFromPage(searchURL, ["Mock","terms"])
-    except RuntimeError as rntmeerr:
-        if "Please show you&#39;re not a robot" in rntmeerr.message:
-            raise RuntimeError("Cannot find the base article due to captcha restriction.")
-        else: # No idea what happened, print the whole source of the site.
-            raise rntmeerr    
+        papers = scholarSearchEngine.getArticlesFromPage(searchURL, ["Mock","terms"], readCache)
+    except PageClassifier.CaptchaError: # Recognised before parsing the page.
+        raise PageClassifier.CaptchaError("Cannot find the base article due to captcha restriction.")
     if len(papers)==0:
-        raise RuntimeError("Cannot find the base article due to captcha restriction.")
+        raise RuntimeError("Cannot find the base article, the search returned no articles.")
     
     # Find targetArticle from the many that will be displayed - will define articleID.
     articleID = 0 # Which article from the page is the one we're looking for.
@@ -444,6 +544,27 @@ def findArticle(targetArticle):
     print "Found article:\n{}\n when looking for:\n{}.".format(papers[articleID],targetArticle)
     return papers[articleID]
 
+def isSameArticle(article,otherArticle):
+    """ Check if two Articles are the same paper on Google Scholar, e.g. the
+    one returned by findArticle (which returns the first result when nothing
+    matches better) and the one that was looked for.
+    
+    Arguments
+    ----------
+    article, otherArticle - Articles to compare.
+    
+    Returns
+    ----------
+    bool, True if both have the same cluster ID in their citingArticlesURL or,
+        if either doesn't have it, their Titles are at least TITLE_SIMILARITY
+        similar.
+    """
+    clusters = [CitedByPattern.search(art.citingArticlesURL) for art in (article,otherArticle)]
+    if all(clusters):
+        return clusters[0].group()==clusters[1].group()
+    return difflib.SequenceMatcher(a=article.Title.lower(), b=otherArticle.Title.lower()).ratio() >= TITLE_SIMILARITY
+
+@CrawlMetrics.timed('citingArticles') # Fetching, parsing and adding all the citing Articles of one Article.
 def addCitingArticlesToNetwork(allArticles,targetIdx,network,trim=None):
     """ Find Articles citing one of all the Articles. Add the corresponding 
     edges to the netwrokx DiGraph.
@@ -458,28 +579,113 @@ def addCitingArticlesToNetwork(allArticles,targetIdx,network,trim=None):
         to the citation of target Article, will be added.
     trim - int or None, how many citing articles to keep, will keep all of them
         if trim is None. Will keep the first trim citing articles that are retreived.
-    """
-    citingArticlesTemp=getCitingArticles(allArticles[targetIdx],CACHE_DIR,trim) # These articles cite the target Article
-    
-    citingArticles=[] # The citing articles without the ones already in allArticles.
-    citingIndices=[] # Indices of allArticles that cite targetIdx article.
-    for tempArt in citingArticlesTemp:
-        if tempArt in allArticles:
-            citingIndices.append(allArticles.index(tempArt))
-        else:
-            citingArticles.append(tempArt)
-    
-    if not trim is None: # Trim the citing articles if desired.
-        citingArticles=citingArticles[:trim]
         
-    # Add edges between the target article and the exisitng allArticles.
-    network.add_edges_from([(targetIdx,i) for i in citingIndices])
+    The pubNoCitations of the target Article is recorded in its
+    crawledNoCitations, @see refreshNetwork.
+    """
+    # Add the citing Articles as soon as every page of them is parsed, instead of after all the pages have been downloaded.
+    noDuplicates=0
+    for tempArt in iterCitingArticles(allArticles[targetIdx],CACHE_DIR,trim): # These articles cite the target Article
+        with CrawlMetrics.stage('dedupe'):
+            if tempArt in allArticles: # Add an edge between the target article and the exisitng one.
+                network.add_edge(targetIdx,allArticles.index(tempArt))
+                noDuplicates+=1
+            else: # Record the new one and add the edge to it.
+                allArticles.append(tempArt)
+                network.add_edge(targetIdx,len(allArticles)-1)
+    CrawlMetrics.increment('duplicates',noDuplicates)
+    allArticles[targetIdx].crawledNoCitations = allArticles[targetIdx].pubNoCitations # Only need to look for the ones above this when refreshing.
+
+def refreshNetwork(allArticles,network,lookUp=True):
+    """ Bring a network built with addCitingArticlesToNetwork up to date
+    without crawling it all over again. Only the Articles whose pubNoCitations
+    has grown since their citing Articles were crawled are crawled again, and
+    only for the citing Articles published since - the results are sorted by
+    date, so the new ones are on the first pages. The new citing Articles and
+    the edges to them are added to allArticles and the network.
     
-    # First add the edges to the citingArticless - need to have unchanged allArticles here.
-    # Account for the fact that we'll extend allArticles with the citingArticles (+len(allArticles)).
-    network.add_edges_from([(targetIdx,i+len(allArticles)) for i in range(len(citingArticles))])
+    Attributes
+    ----------
+    allArticles - a list of Articles; will extend it with the new citing Articles.
+        Only the ones with crawledNoCitations, i.e. whose citing Articles have
+        been added with addCitingArticlesToNetwork, are refreshed.
+    network - networkx.classes.digraph.DiGraph with the citations between
+        allArticles, will add the new ones to it.
+    lookUp - bool, whether to look up the current pubNoCitations of every
+        Article on Google Scholar with findArticle, unless it's been on one of
+        the pages fetched while refreshing. Otherwise, only the counts that
+        have been updated since the last crawl are used.
     
-    allArticles.extend(citingArticles) # Record these here.
+    Returns
+    ----------
+    dict with the statistics of the refresh: no. Articles checked, refreshed
+        (with new citations), and new articles and edges added.
+    """
+    global nextRequestTime
+    stats = {'checked':0, 'refreshed':0, 'articles':0, 'edges':0}
+    upToDate = set() # Indices of the Articles whose pubNoCitations we've got during this refresh.
+    for targetIdx in range(len(allArticles)): # New Articles aren't crawled, so won't be refreshed.
+        target = allArticles[targetIdx]
+        if getattr(target,'crawledNoCitations',None) is None:
+            continue
+        stats['checked'] += 1
+        
+        if lookUp and targetIdx not in upToDate:
+            waitForNextRequest()
+            try:
+                found = findArticle(target,readCache=False) # The cached results would have the old count.
+            except PageClassifier.CaptchaError: # Can still refresh using the counts we already have.
+                print "Couldn't look up the no. citations of:\n{}".format(target)
+                nextRequestTime = time.time()+PageClassifier.getBackoffTime(PageClassifier.PAGE_CAPTCHA,1)
+            except RuntimeError: # No results, nothing to back off from.
+                print "Couldn't find on Google Scholar:\n{}".format(target)
+                nextRequestTime = time.time()+PageClassifier.getBackoffTime(PageClassifier.PAGE_RESULTS)
+            else:
+                if isSameArticle(target,found): # findArticle falls back to the first result, which may be another paper.
+                    target.pubNoCitations = found.pubNoCitations
+                    if target.citingArticlesURL=="UNKNOWN": # Had no citations at the last crawl.
+                        target.citingArticlesURL = found.citingArticlesURL
+                else:
+                    print "Didn't find on Google Scholar:\n{}".format(target)
+                nextRequestTime = time.time()+PageClassifier.getBackoffTime(PageClassifier.PAGE_RESULTS)
+        
+        noNew = target.pubNoCitations-target.crawledNoCitations # How many citing Articles we're missing.
+        if noNew <= 0:
+            continue
+        if target.citingArticlesURL=="UNKNOWN": # Don't know where its citing Articles are yet, maybe next time.
+            print "No URL of the citing Articles of:\n{}".format(target)
+            continue
+        stats['refreshed'] += 1
+        
+        # Newest citing Articles first. Stop once we've found all the new ones, or seen a whole page of ones we've already got.
+        noFound = 0
+        noKnownInRow = 0
+        for tempArt in iterCitingArticles(target,CACHE_DIR,sortByDate=True,readCache=False):
+            with CrawlMetrics.stage('dedupe'):
+                if tempArt in allArticles: # This Article's on the page with its current no. citations.
+                    artIdx = allArticles.index(tempArt)
+                    allArticles[artIdx].pubNoCitations = tempArt.pubNoCitations
+                    if allArticles[artIdx].citingArticlesURL=="UNKNOWN": # Had no citations at the last crawl.
+                        allArticles[artIdx].citingArticlesURL = tempArt.citingArticlesURL
+                    upToDate.add(artIdx)
+                else:
+                    allArticles.append(tempArt)
+                    artIdx = len(allArticles)-1
+                    stats['articles'] += 1
+                
+                if network.has_edge(targetIdx,artIdx):
+                    noKnownInRow += 1
+                else:
+                    network.add_edge(targetIdx,artIdx)
+                    stats['edges'] += 1
+                    noFound += 1
+                    noKnownInRow = 0
+            if noFound>=noNew or noKnownInRow>=20:
+                break
+        target.crawledNoCitations = target.pubNoCitations
+    
+    print "Refreshed {refreshed} of {checked} Articles, added {articles} Articles and {edges} citations.".format(**stats)
+    return stats
 
 def findNGrams(tokens,lengths=[2,3,4,5]):
     """ Given an iterable of tokens (a sequence of words and punctuation
@@ -508,7 +714,8 @@ def findNGrams(tokens,lengths=[2,3,4,5]):
     fdist=nltk.FreqDist(combinedGrams)
     return combinedGrams,fdist.values()
 
-def getArticleKeywords(articles, maxLength=3):
+@CrawlMetrics.timed('keywords')
+def getArticleKeywords(articles, maxLength=3, tokenCache=None):
     """ Parse titles of a number of articles and extract keywords that occur
     in them. A keyword is defined as a grouping of several words, with punctuation
     and stopwords (*nltk.corpus.stopwords.words('english')*) removed. Will 
@@ -519,6 +726,8 @@ def getArticleKeywords(articles, maxLength=3):
     ----------
     articles - a list of Articles.
     maxLength - int, the largest number of tokens per keyword.
+    tokenCache - TextResources.TokenCache or None, where to get the tokens of
+        the titles that have been tokenised before, e.g. in a previous run.
     
     Returns
     ----------
@@ -536,14 +745,12 @@ def getArticleKeywords(articles, maxLength=3):
     Out of these, ['A','of','the','an','of the','of an'] would be filtered out.
     """
     
-    # Identify keywords.
-    tokens=[]
-    for title in [art.Title for art in articles]:
-        tokens.extend(nltk.wordpunct_tokenize(title))
-    
-    # Filter out meaningless words and punctuation.
-    tokens=filter(lambda s: not s.lower() in nltk.corpus.stopwords.words('english') and
-        not s in string.punctuation, tokens)
+    # Identify keywords, with the meaningless words and punctuation filtered out.
+    if tokenCache is None:
+        titleTokens=[TextResources.keywordTokens(art.Title) for art in articles]
+    else:
+        titleTokens=[tokenCache.getTokens(art.Title,'keywords') for art in articles]
+    tokens=[token for artTitleTokens in titleTokens for token in artTitleTokens]
 
     # Find keywords (length 1, 2, or 3) and how often they occur in all the titles.
     keywords,frequencies=findNGrams(tokens,lengths=range(1,maxLength+1))
@@ -555,17 +762,13 @@ def getArticleKeywords(articles, maxLength=3):
 
     # Assign keywords to Articles.
     for i in range(len(articles)):
-        artTitleTokens=nltk.wordpunct_tokenize(articles[i].Title) # The tokens of this article's title.
-        # Filter out meaningless words and punctuation.
-        artTitleTokens=filter(lambda s: not s.lower() in nltk.corpus.stopwords.words('english') and
-            not s in string.punctuation, artTitleTokens)
-        
         # Use the same algorithm but for this article only.
-        artKeywords,artFreq=findNGrams(artTitleTokens,lengths=[1,2,3])
+        artKeywords,artFreq=findNGrams(titleTokens[i],lengths=[1,2,3])
         articles[i].Keywords=artKeywords
     
     return keywords,frequencies
 
+@CrawlMetrics.timed('features')
 def collectArticleFeatures(articles,keywords):
     """ Given a list of articles and the desired keywords, find which keywords
     appear in which article. Build a matrix that reflects this.
@@ -655,7 +858,10 @@ if __name__=="__main__": # If this is run as a stand-alone script run the verifi
         --------------------------------------------------------------------
     """
     " Extract keywords from Articles' titles. "
-    keywords,frequencies=getArticleKeywords(allArticles, maxLength=3)
+    # Keep the tokens between the runs, changing the parameters below then doesn't re-tokenise all the titles.
+    tokenCache=TextResources.TokenCache('articleTokens.npz')
+    keywords,frequencies=getArticleKeywords(allArticles, maxLength=3, tokenCache=tokenCache)
+    tokenCache.save()
     
     # Trim to only keep the keywords that appear more than once.
     keywords=keywords[numpy.where(frequencies>1)]
@@ -668,18 +874,19 @@ if __name__=="__main__": # If this is run as a stand-alone script run the verifi
     " Use sklearn to find no. clusters and which article belongs to which cluster. "
     clusterSizes=range(2,4) # Try a few different cluster sizes.
     scores=[] # Corresponding slihouette scores.
-    for n_clusters in clusterSizes:
-        clusterer = sklearn.cluster.KMeans(n_clusters=n_clusters)
-        cluster_labels = clusterer.fit_predict(articleFeatures)
-        # The silhouette_score gives the average value for all the samples.
-        # This gives a perspective into the density and separation of the formed clusters.
-        silhouette_avg = sklearn.metrics.silhouette_score(articleFeatures, cluster_labels)
-        print("For n_clusters =", n_clusters,"The average silhouette_score is :", silhouette_avg)
-        scores.append(silhouette_avg)
-    
-    # Use the best no. clusters.
-    clusterer=sklearn.cluster.KMeans(n_clusters=clusterSizes[scores.index(max(scores))])
-    cluster_labels=clusterer.fit_predict(articleFeatures)
+    with CrawlMetrics.stage('clustering'):
+        for n_clusters in clusterSizes:
+            clusterer = sklearn.cluster.KMeans(n_clusters=n_clusters)
+            cluster_labels = clusterer.fit_predict(articleFeatures)
+            # The silhouette_score gives the average value for all the samples.
+            # This gives a perspective into the density and separation of the formed clusters.
+            silhouette_avg = sklearn.metrics.silhouette_score(articleFeatures, cluster_labels)
+            print("For n_clusters =", n_clusters,"The average silhouette_score is :", silhouette_avg)
+            scores.append(silhouette_avg)
+        
+        # Use the best no. clusters.
+        clusterer=sklearn.cluster.KMeans(n_clusters=clusterSizes[scores.index(max(scores))])
+        cluster_labels=clusterer.fit_predict(articleFeatures)
 
     " Histogram of keywords. "
     fig, ax = matplotlib.pyplot.subplots(1,figsize=(12,8))
@@ -708,6 +915,10 @@ if __name__=="__main__": # If this is run as a stand-alone script run the verifi
     nodePatches=networkx.draw_networkx_nodes(G, poses, cmap=matplotlib.pyplot.get_cmap('jet'), node_color=cluster_labels, node_size=noCitations, ax=ax)
     networkx.draw_networkx_edges(G, poses, edge_color='k', arrows=True, ax=ax)
     
+    # Also connect the Articles with similar keywords, found offline instead of following their relatedArticlesURLs.
+    related=RelatedArticles.RelatedArticles(articleFeatures,k=3,threshold=0.5)
+    networkx.draw_networkx_edges(related.getSimilarityGraph(), poses, edge_color='g', style='dashed', ax=ax)
+    
     # Draw keywords of every Article.
     networkx.draw_networkx_labels(G, poses, dict(zip(range(len(allArticles)),[keywords[articleFeatures[i,:]] for i in range(len(allArticles))])), font_size=graphLabelFontSize, ax=ax)
     
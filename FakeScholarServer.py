@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+A local stand-in for Google Scholar. Serves synthetic results pages for a
+generated citation graph, in the same format as the real Scholar pages, so that
+GoogleScholarSearch and DownloadArticles can parse them as they are. Supports
+searching by title (q=), pages of citing articles (cites=, start=, num=,
+sorted by date with scisbd=1), and the "Cited by" counts. New articles can be
+published while the server's running, to test refreshing a crawled network. Serves the captcha page from captchaSrc whenever the
+configured rate limit rules say we've been sending requests too quickly.
+
+All the rate limits are evaluated using a VirtualClock, so that sleeping
+between the requests doesn't take real time, @see CrawlSimulation.
+
+@author: Alek
+@version: 1.0.1
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Sort the citing articles by date with scisbd=1, publish new articles.
+"""
+import BaseHTTPServer, SocketServer, threading, urlparse, random, cgi, collections, ast, os
+
+CAPTCHA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),'captchaSrc') # Actual captcha page we got from Scholar.
+
+" Building blocks of the synthetic articles. "
+TITLE_WORDS = ['plasma','probe','langmuir','sheath','electron','ion','density','temperature',
+    'measurement','theory','collector','discharge','gaseous','magnetic','field','spacecraft',
+    'charging','emission','current','potential','debris','orbit','model','simulation','kinetic',
+    'particle','wave','instability','boundary','layer','thruster','ionosphere','dust','beam']
+FILLER_WORDS = ['of','the','in','a','on','for','and','with']
+SURNAMES = ['Langmuir','Tonks','Mott-Smith','Bohm','Chen','Hutchinson','Laframboise','Hastings',
+    'Garrett','Whipple','Allen','Boyd','Riemann','Sheridan','Goree','Stangeby','Lieberman','Kilpua']
+JOURNALS = ['Physical Review','Journal of Applied Physics','Physics of Plasmas','Plasma Sources Science and Technology',
+    'Journal of Geophysical Research','Journal of Spacecraft and Rockets','Advances in Space Research']
+
+class VirtualClock(object):
+    """ A clock that only moves forward when somebody sleeps on it. Has the
+    same time() and sleep() methods as the time module, so it can be used in
+    its place.
+    """
+    def __init__(self, start=0.):
+        """ Start the clock at the given time in seconds. """
+        self.now = float(start)
+        self.lock = threading.Lock()
+
+    def time(self):
+        """ Current virtual time in seconds. """
+        with self.lock:
+            return self.now
+
+    def sleep(self, dt):
+        """ Advance the clock by dt seconds without waiting. """
+        with self.lock:
+            self.now += max(0.,float(dt))
+
+class RateLimitRule(object):
+    """ Serve captchas when more than maxRequests requests have been received
+    within the last window seconds. Once triggered, keep serving captchas for
+    blockDuration seconds or until the captcha is solved.
+    """
+    def __init__(self, maxRequests, window, blockDuration=3600.):
+        """
+        Arguments
+        ----------
+        maxRequests - int, most requests allowed within the window.
+        window - float, length of the sliding window in seconds.
+        blockDuration - float, for how long to block once the rule's triggered.
+        """
+        self.maxRequests = maxRequests
+        self.window = window
+        self.blockDuration = blockDuration
+        self.requestTimes = collections.deque()
+        self.blockedUntil = -1.
+
+    def isBlocked(self, now):
+        """ Record a request at time now and say whether it should get a captcha. """
+        if now < self.blockedUntil:
+            return True
+        self.requestTimes.append(now)
+        while self.requestTimes and self.requestTimes[0] <= now-self.window:
+            self.requestTimes.popleft()
+        if len(self.requestTimes) > self.maxRequests:
+            self.blockedUntil = now+self.blockDuration
+            self.requestTimes.clear()
+            return True
+        return False
+
+    def reset(self):
+        """ Forget about the block, e.g. when the captcha's been solved. """
+        self.blockedUntil = -1.
+        self.requestTimes.clear()
+
+DEFAULT_RULES = [(20,600.,3600.), (200,24*3600.,6*3600.)] # Arguments of RateLimitRules, roughly what we see from Scholar.
+
+def _makeArticle(rng, articles, attachment, meanReferences, year):
+    """ Make a synthetic article, make it cite some of the existing articles,
+    and append it to the articles. """
+    i = len(articles)
+    titleWords = rng.sample(TITLE_WORDS,rng.randint(3,6))
+    for j in range(1,len(titleWords),2): # Make it look a bit more like a title.
+        titleWords[j] = rng.choice(FILLER_WORDS)+' '+titleWords[j]
+    title = ' '.join(titleWords).capitalize()+' {}'.format(i) # Unique titles make the searching unambiguous.
+    authors = ['{} {}'.format(rng.choice('ABCDEFGHIJKLMNOPRSTW'),rng.choice(SURNAMES)) for a in range(rng.randint(1,4))]
+    articles.append({'ID':i, 'Title':title, 'Authors':authors, 'Journal':rng.choice(JOURNALS),
+        'Year':year, 'CitedBy':[],
+        'Abstract':' '.join(rng.choice(TITLE_WORDS+FILLER_WORDS) for w in range(30))})
+
+    if attachment: # Cite some of the older articles.
+        cited = set(rng.choice(attachment) for r in range(int(rng.expovariate(1./meanReferences))))
+        for c in cited:
+            articles[c]['CitedBy'].append(i)
+            attachment.append(c)
+    attachment.append(i)
+    return articles[-1]
+
+def generateCitationGraph(noArticles, meanReferences=8, firstYear=1920, lastYear=2016, seed=0):
+    """ Generate synthetic articles and who cites whom. Articles cite older ones,
+    preferentially the ones that are already cited a lot, like in real life.
+
+    Arguments
+    ----------
+    noArticles - int, how many articles to generate.
+    meanReferences - float, average number of articles every article cites.
+    firstYear, lastYear - ints, years the articles are published in.
+    seed - int, seed of the random number generator for repeatable graphs.
+
+    Returns
+    ----------
+    list of dicts with keys ID, Title, Authors, Journal, Year, Abstract and
+        CitedBy (list of IDs of the articles citing this one). ID is the index
+        in the list, articles are sorted by Year.
+    """
+    rng = random.Random(seed)
+    articles = []
+    attachment = [] # Every article appears here once plus once per citation, for preferential attachment.
+    for i in range(noArticles):
+        _makeArticle(rng,articles,attachment,meanReferences,firstYear+(lastYear-firstYear)*i//max(1,noArticles))
+    return articles
+
+class FakeScholar(object):
+    """ Answers Google Scholar requests using a synthetic citation graph. Doesn't
+    know anything about HTTP, @see FakeScholarServer.
+    """
+    def __init__(self, articles, clock=None, rules=None, captchaProbability=0., seed=0):
+        """
+        Arguments
+        ----------
+        articles - list of dicts with the articles, @see generateCitationGraph.
+        clock - VirtualClock used to evaluate the rate limits; a new one if None.
+        rules - list of RateLimitRules, made from DEFAULT_RULES if None, [] to
+            never block.
+        captchaProbability - float, chance of serving a captcha regardless of the rules.
+        seed - int, seed for the random captchas.
+        """
+        self.articles = articles
+        self.clock = VirtualClock() if clock is None else clock
+        self.rules = [RateLimitRule(*args) for args in DEFAULT_RULES] if rules is None else rules
+        self.captchaProbability = captchaProbability
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        with open(CAPTCHA_FILE,'r') as captchaFile: # It's the repr of the unicode source.
+            self.captchaSource = ast.literal_eval(captchaFile.read()).encode('utf-8')
+
+        self.titleIndex = collections.defaultdict(set) # Title word -> IDs of articles, for searching.
+        for art in articles:
+            for word in art['Title'].lower().split():
+                self.titleIndex[word].add(art['ID'])
+
+        self.stats = collections.Counter() # How many pages of every type we've served.
+
+    def publish(self, noArticles, year, meanReferences=8):
+        """ Add new articles, which cite the existing ones, like what happens
+        between two crawls.
+
+        Arguments
+        ----------
+        noArticles - int, how many articles to add.
+        year - int, the year they're published in.
+        meanReferences - float, average number of articles every one cites.
+        """
+        with self.lock:
+            attachment = [a['ID'] for a in self.articles for c in range(len(a['CitedBy'])+1)]
+            for i in range(noArticles):
+                art = _makeArticle(self.rng,self.articles,attachment,meanReferences,year)
+                for word in art['Title'].lower().split():
+                    self.titleIndex[word].add(art['ID'])
+
+    def solveCaptcha(self):
+        """ Pretend somebody's shown we're not a robot - lifts all the blocks. """
+        with self.lock:
+            for rule in self.rules:
+                rule.reset()
+            self.stats['solved'] += 1
+
+    def getPage(self, path):
+        """ Get the source of the page that Scholar would return for the given
+        path, e.g. /scholar?start=20&num=20&cites=123&as_sdt=0,5.
+
+        Returns
+        ----------
+        str with the HTML source of the page.
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+            now = self.clock.time()
+            blocked = [rule.isBlocked(now) for rule in self.rules] # Every rule has to see every request.
+            if any(blocked) or self.rng.random() < self.captchaProbability:
+                self.stats['captcha'] += 1
+                return self.captchaSource
+
+        query = urlparse.parse_qs(urlparse.urlparse(path).query)
+        start = int(query.get('start',['0'])[0])
+        num = int(query.get('num',['10'])[0])
+        if 'cites' in query:
+            ids = self.articles[int(query['cites'][0])]['CitedBy']
+            if query.get('scisbd',['0'])[0]=='1': # Newest first; the IDs go up with the years.
+                ids = sorted(ids,reverse=True)[:1000]
+            else:
+                ids = sorted(ids, key=lambda i: -len(self.articles[i]['CitedBy']))[:1000] # Scholar only shows 1000 results.
+        else:
+            words = query.get('q',[''])[0].lower().replace('+',' ').split() # search() joins the terms with a literal +.
+            scores = collections.Counter()
+            for word in words:
+                for i in self.titleIndex.get(word,()):
+                    scores[i] += 1
+            ids = [i for i,score in scores.most_common()]
+        ids = ids[start:start+num]
+
+        with self.lock:
+            self.stats['results' if ids else 'empty'] += 1
+        return self.renderPage([self.articles[i] for i in ids])
+
+    def renderPage(self, articles):
+        """ Make a Scholar results page with the given articles. """
+        records = []
+        for art in articles:
+            links = []
+            if art['CitedBy']:
+                links.append('<a href="/scholar?cites={}&amp;as_sdt=2005&amp;sciodt=0,5&amp;hl=en">Cited by {}</a>'.format(art['ID'],len(art['CitedBy'])))
+            links.append('<a href="/scholar?q=related:{}:scholar.google.com/&amp;hl=en&amp;as_sdt=0,5">Related articles</a>'.format(art['ID']))
+            records.append('<div class="gs_r"><div class="gs_ri"><h3 class="gs_rt"><a href="http://fake.scholar/{id}">{title}</a></h3>'
+                '<div class="gs_a">{authors} - {journal}, {year} - fake.scholar</div><div class="gs_rs">{abstract}</div>'
+                '<div class="gs_fl">{links}</div></div></div>'.format(id=art['ID'], title=cgi.escape(art['Title']),
+                authors=cgi.escape(', '.join(art['Authors'])), journal=cgi.escape(art['Journal']), year=art['Year'],
+                abstract=cgi.escape(art['Abstract']), links=' '.join(links)))
+        return ('<!DOCTYPE html><html><head><title>Google Scholar</title></head><body>'
+            '<div id="gs_bdy"><div id="gs_lnv"></div><div role="main" id="gs_ccl">{}</div></div></body></html>').format(''.join(records))
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Pass the GET requests on to the FakeScholar of the server. """
+    def do_GET(self):
+        body = self.server.scholar.getPage(self.path)
+        self.send_response(200)
+        self.send_header('Content-Type','text/html; charset=UTF-8')
+        self.send_header('Content-Length',str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Don't print every request.
+
+class FakeScholarServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """ HTTP server on localhost that serves the pages of a FakeScholar in
+    a background thread.
+
+    Example
+    ----------
+    <tt>
+    > server = FakeScholarServer(FakeScholar(generateCitationGraph(1000)))\n
+    > server.start()\n
+    > urllib2.urlopen(server.url+'/scholar?q=plasma').read()\n
+    > server.stop()
+    </tt>
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, scholar, port=0):
+        """
+        Arguments
+        ----------
+        scholar - FakeScholar that will answer the requests.
+        port - int, port to listen on; any free port if 0.
+        """
+        BaseHTTPServer.HTTPServer.__init__(self,('127.0.0.1',port),_Handler)
+        self.scholar = scholar
+        self.host = '127.0.0.1:{}'.format(self.server_address[1]) # Can be used as GoogleScholarSearchEngine.SEARCH_HOST.
+        self.url = 'http://'+self.host
+        self.thread = None
+
+    def start(self):
+        """ Start serving in a background thread. """
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """ Stop serving and release the port. """
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+
+if __name__ == '__main__':
+    import urllib2
+    server = FakeScholarServer(FakeScholar(generateCitationGraph(1000),rules=[]))
+    server.start()
+    print "Serving a fake Scholar at {}".format(server.url)
+    print urllib2.urlopen(server.url+'/scholar?q=plasma+probe&num=2').read()
+    server.stop()
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Ways of getting web pages, all with the same interface - fetch(url) returns
+a Response or raises IOError when the connection can't be established - so
+that the scraping code doesn't care where the pages come from:
+    * HTTPBackend gets them over HTTP with requests,
+    * BrowserBackend gets them with Selenium and Firefox, for the sites that
+      don't like scripts,
+    * RecordingBackend passes the requests on to another backend and saves
+      every Response on the way,
+    * ReplayBackend serves the saved Responses from disk, without any network
+      access, as fast as the disk allows or with the recorded latencies.
+Replaying a recorded crawl is deterministic, so it can be used to benchmark
+and profile parsing and everything after it, @see CrawlMetrics.
+
+Example
+----------
+<tt>
+> DownloadArticles.useFetchBackend(RecordingBackend(DownloadArticles.browserBackend, 'recorded'))\n
+> ... # Crawl as usual.\n
+> DownloadArticles.useFetchBackend(ReplayBackend('recorded', latency='sampled'))\n
+> ... # The same crawl again, offline.
+</tt>
+
+@author: Alek
+@version: 1.0.1
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Optionally follow redirects, decode the pages with their charset, added Response.raiseForStatus.
+"""
+import os, re, time, random, hashlib, cPickle, requests
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0', # Just pretend to be a Mozilla.
+   'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+   'Accept-Charset': 'ISO-8859-1,utf-8;q=0.7,*;q=0.3',
+   'Accept-Language': 'en-US,en;q=0.8',
+   'Connection': 'keep-alive'}
+
+CharsetPattern = re.compile('charset=["\']?([\w.:-]+)', re.I) # In the Content-Type header.
+
+class Response(object):
+    """ A fetched page. """
+    def __init__(self, url, status, body, headers={}, elapsed=0., reason=''):
+        """
+        Arguments
+        ----------
+        url - str with the URL that was fetched.
+        status - int with the HTTP status, 200 if the backend doesn't know.
+        body - str with the bytes of the page.
+        headers - dict with the HTTP headers of the response.
+        elapsed - float, seconds it took to get the page.
+        reason - str with the HTTP reason phrase, e.g. 'Not Found'.
+        """
+        self.url = url
+        self.status = status
+        self.body = body
+        self.headers = dict((name.lower(),value) for name,value in headers.items())
+        self.elapsed = elapsed
+        self.reason = reason
+
+    @property
+    def charset(self):
+        """ str with the encoding the Content-Type header declares, UTF-8 if
+        it doesn't declare any. """
+        found = CharsetPattern.search(self.getheader('content-type',''))
+        return found.group(1) if found else 'utf-8'
+
+    @property
+    def text(self):
+        """ unicode with the page, decoded with its charset. """
+        try:
+            return self.body.decode(self.charset,'replace')
+        except LookupError: # Made-up encoding.
+            return self.body.decode('utf-8','replace')
+
+    def raiseForStatus(self):
+        """ Raise IOError unless the status says the page was got successfully (2xx). """
+        if not 200 <= self.status < 300:
+            raise IOError("Couldn't get {}. Error code: {}, Reason: {}".format(self.url,self.status,self.reason))
+
+    def getheader(self, name, default=None):
+        """ Get a header of the response, regardless of the case of its name. """
+        return self.headers.get(name.lower(),default)
+
+class FetchBackend(object):
+    """ Gets web pages. Subclasses implement fetch. """
+    isRemote = True # Whether the pages come from a server that mustn't get the requests too quickly.
+
+    def fetch(self, url, headers=None, followRedirects=False):
+        """ Get the page at the URL.
+
+        Arguments
+        ----------
+        url - str with the full URL.
+        headers - dict with the HTTP headers to send, if the backend can.
+        followRedirects - bool, whether to get the page a redirect points to,
+            or return the redirect itself, if the backend can tell them apart.
+
+        Returns
+        ----------
+        Response, whatever its status.
+
+        Raises
+        ----------
+        IOError when the connection can't be established.
+        """
+        raise NotImplementedError
+
+    def record(self, response):
+        """ Remember a Response that's been got some other way, e.g. the page
+        we got after solving a captcha. Only RecordingBackend does anything. """
+        pass
+
+    def close(self):
+        """ Free whatever the backend's holding on to. """
+        pass
+
+class HTTPBackend(FetchBackend):
+    """ Get the pages with requests. Redirects aren't followed unless asked
+    for, so that the redirects to Google's block page can be told apart. """
+    def __init__(self, timeout=30, headers=DEFAULT_HEADERS):
+        """
+        Arguments
+        ----------
+        timeout - float, seconds to wait for the server.
+        headers - dict with the HTTP headers to send by default.
+        """
+        self.timeout = timeout
+        self.headers = headers
+        self.session = requests.Session() # Keeps the connections open between the requests.
+
+    def fetch(self, url, headers=None, followRedirects=False):
+        start = time.time()
+        resp = self.session.get(url, headers=self.headers if headers is None else headers, timeout=self.timeout,
+            allow_redirects=followRedirects) # requests' exceptions are IOErrors.
+        return Response(url, resp.status_code, resp.content, resp.headers, time.time()-start, resp.reason)
+
+    def close(self):
+        self.session.close()
+
+class BrowserBackend(FetchBackend):
+    """ Get the pages with Firefox through Selenium. The browser doesn't give
+    the HTTP status, so it's always 200, @see PageClassifier for telling the
+    pages apart. """
+    def __init__(self, keepOpen=False):
+        """
+        Arguments
+        ----------
+        keepOpen - bool, whether to keep one Firefox open for all the pages
+            until close() is called, or open a new one for every page.
+        """
+        self.keepOpen = keepOpen
+        self.driver = None
+
+    def fetch(self, url, headers=None, followRedirects=False): # The browser always follows the redirects.
+        if self.driver is None:
+            from selenium import webdriver # Only needed when the browser's used.
+            self.driver = webdriver.Firefox() # Open Firefox.
+        start = time.time()
+        try:
+            self.driver.get(url) # Go to the page.
+            src = self.driver.page_source.encode('utf-8') # The page says it's UTF-8.
+        finally:
+            if not self.keepOpen:
+                self.close()
+        return Response(url, 200, src, {'Content-Type':'text/html; charset=utf-8'}, time.time()-start)
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.close()
+            self.driver = None
+
+def _recordingName(directory, url):
+    """ Get the file where the Response from the URL is recorded. """
+    return os.path.join(directory,hashlib.sha1(url).hexdigest())
+
+class RecordingBackend(FetchBackend):
+    """ Fetch the pages with another backend and save every Response, so that
+    they can be replayed with ReplayBackend. The last Response from every URL
+    is kept. """
+    def __init__(self, backend, directory):
+        """
+        Arguments
+        ----------
+        backend - FetchBackend that gets the pages.
+        directory - str with the directory where to save the Responses.
+        """
+        self.backend = backend
+        self.isRemote = backend.isRemote
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def fetch(self, url, headers=None, followRedirects=False):
+        response = self.backend.fetch(url,headers,followRedirects)
+        self.record(response)
+        return response
+
+    def record(self, response):
+        with open(_recordingName(self.directory,response.url),"wb") as recording:
+            cPickle.dump(response,recording,cPickle.HIGHEST_PROTOCOL)
+
+    def close(self):
+        self.backend.close()
+
+class ReplayBackend(FetchBackend):
+    """ Serve the Responses saved by RecordingBackend. """
+    isRemote = False # No need to wait between the requests.
+
+    def __init__(self, directory, latency=None, clock=time, seed=0):
+        """
+        Arguments
+        ----------
+        directory - str with the directory with the recorded Responses.
+        latency - how long every fetch takes:
+            * None - as long as it takes to read the Response from disk,
+            * 'recorded' - as long as it took to get this Response when it was recorded,
+            * 'sampled' - a random one of the recorded latencies of all the Responses.
+        clock - object with a sleep() method, e.g. the time module or a
+            FakeScholarServer.VirtualClock.
+        seed - int, seed for the sampled latencies, for repeatable replays.
+        """
+        if latency not in (None,'recorded','sampled'):
+            raise ValueError("Unknown latency {}, use None, 'recorded' or 'sampled'.".format(latency))
+        self.directory = directory
+        self.latency = latency
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.latencies = None # All the recorded ones, read when needed.
+
+    def fetch(self, url, headers=None, followRedirects=False):
+        try:
+            with open(_recordingName(self.directory,url),"rb") as recording:
+                response = cPickle.load(recording)
+        except IOError:
+            raise IOError("No recorded response from {}.".format(url))
+
+        if self.latency=='recorded':
+            self.clock.sleep(response.elapsed)
+        elif self.latency=='sampled':
+            if self.latencies is None:
+                self.latencies = []
+                for name in sorted(os.listdir(self.directory)): # Sorted, so the same seed gives the same latencies.
+                    with open(os.path.join(self.directory,name),"rb") as recording:
+                        self.latencies.append(cPickle.load(recording).elapsed)
+            self.clock.sleep(self.rng.choice(self.latencies))
+        return response
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Inverted index of the words in the Titles, Abstracts and Keywords of a
+collection of Articles, to find the Articles interactively instead of looping
+over allArticles. Answers boolean queries (AND by default, OR, -excluded
+words) and "quoted phrases", and ranks the results either by pubNoCitations
+or by tf-idf score.
+
+Every word has a posting list with the IDs of the Articles it appears in, how
+many times it appears in each of them, and where. The IDs are delta-encoded and
+stored, like the counts and positions, in the narrowest numpy dtype that fits,
+so a posting takes a few bytes rather than tens of bytes of Python ints.
+Articles can be added incrementally; the new postings are kept in Python
+lists until the next query, which merges them into the compressed lists.
+
+Example
+----------
+<tt>
+> index = FullTextIndex(allArticles)\n
+> index.search('langmuir probe -sheath')\n
+> index.search('"plasma sheath" OR collector', rankBy='score', limit=10)
+</tt>
+
+@author: Alek
+@version: 1.0.2
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Ignore the query items without any words, e.g. a standalone &.
+                - 1.0.2 - Alek - Tokenise the decoded text, so that the words with non-ASCII letters aren't split.
+"""
+import re, math, numpy
+
+WordPattern = re.compile(r'\w+', re.UNICODE) # Words and numbers, in any alphabet.
+QueryPattern = re.compile('-?"[^"]*"|\S+') # Phrases in quotes, or single words.
+FIELDS = ['Title', 'Abstract', 'Keywords'] # Attributes of the Articles that are indexed.
+MAX_DECODED = 4096 # How many decoded posting lists to keep, the frequent words tend to be queried again.
+POSITION_STRIDE = 2**20 # Positions in all the Articles are combined into ID*POSITION_STRIDE+position, for phrase queries.
+
+def tokenise(text):
+    """ Split text into lower-case words.
+
+    Arguments
+    ----------
+    text - str or unicode.
+
+    Returns
+    ----------
+    list of UTF-8 str with the words.
+    """
+    if not isinstance(text,unicode): # Split the characters, not their bytes, like TextResources.keywordTokens.
+        text = text.decode('utf-8','replace')
+    return [word.encode('utf-8') for word in WordPattern.findall(text.lower())]
+
+def _narrow(values):
+    """ Store non-negative ints in the narrowest unsigned dtype that fits them. """
+    values = numpy.asarray(values,dtype=numpy.int64)
+    top = values.max() if values.size else 0
+    for dtype in (numpy.uint8, numpy.uint16, numpy.uint32):
+        if top <= numpy.iinfo(dtype).max:
+            return values.astype(dtype)
+    return values
+
+def _deltas(ids, previous=0):
+    """ Delta-encode sorted IDs, the first one relative to previous. """
+    return numpy.concatenate(([ids[0]-previous],numpy.diff(ids)))
+
+class FullTextIndex(object):
+    """ Inverted index of Articles' Titles, Abstracts and Keywords. The IDs of
+    the Articles are their indices in the list they're added from, i.e. also
+    the node indices of the citation network.
+    """
+    def __init__(self, articles=[]):
+        """
+        Arguments
+        ----------
+        articles - list of Articles to index.
+        """
+        self.postings = {} # Word -> (delta-encoded IDs, counts, positions), all compressed.
+        self.pending = {} # Word -> ([IDs], [counts], [positions]) added since the last merge.
+        self.decoded = {} # Word -> (IDs, positions offsets, combined positions) as int64 arrays.
+        self.citations = numpy.zeros(0,dtype=numpy.int64) # pubNoCitations of every Article, for ranking.
+        self._pendingCitations = []
+        self.noArticles = 0
+        self.addArticles(articles)
+
+    def addArticles(self, articles):
+        """ Add more Articles to the index. Their IDs continue from the last
+        Article that's been added.
+
+        Arguments
+        ----------
+        articles - list of Articles.
+
+        Returns
+        ----------
+        list of ints with the IDs given to the Articles.
+        """
+        ids = range(self.noArticles,self.noArticles+len(articles))
+        for articleID, art in zip(ids,articles):
+            positions = {} # Word -> positions in this Article.
+            position = 0
+            for field in FIELDS:
+                value = getattr(art,field,None) or ''
+                for text in (value if isinstance(value,list) else [value]):
+                    for word in tokenise(text):
+                        positions.setdefault(word,[]).append(position)
+                        position += 1
+                    position += 1 # Phrases can't span two fields or two keywords.
+            for word, wordPositions in positions.iteritems():
+                pending = self.pending.get(word)
+                if pending is None:
+                    pending = self.pending[word] = ([],[],[])
+                pending[0].append(articleID)
+                pending[1].append(len(wordPositions))
+                pending[2].extend(wordPositions)
+            self._pendingCitations.append(getattr(art,'pubNoCitations',0))
+        self.noArticles += len(articles)
+        return ids
+
+    def _merge(self):
+        """ Merge the pending postings into the compressed ones. """
+        if not self.pending and not self._pendingCitations:
+            return
+        for word, (ids, counts, positions) in self.pending.iteritems():
+            old = self._decode(word) if word in self.postings else None
+            self.decoded.pop(word,None)
+            ids = numpy.array(ids,dtype=numpy.int64)
+            if old is None:
+                deltas = _deltas(ids)
+                oldCounts, oldPositions = [], []
+            else: # New IDs are always larger than the old ones, so the lists can just be appended.
+                deltas = numpy.concatenate((_deltas(old[0]),_deltas(ids,old[0][-1])))
+                oldCounts, oldPositions = numpy.diff(old[1]), old[2]%POSITION_STRIDE
+            self.postings[word] = (_narrow(deltas), _narrow(numpy.concatenate((oldCounts,counts))),
+                _narrow(numpy.concatenate((oldPositions,positions))))
+        self.pending = {}
+        self.citations = numpy.concatenate((self.citations,numpy.array(self._pendingCitations,dtype=numpy.int64)))
+        self._pendingCitations = []
+
+    def _decode(self, word):
+        """ Get the posting list of a word as (IDs, offsets, positions), where
+        the positions of the word in the i-th Article are positions[offsets[i]:offsets[i+1]],
+        combined with the IDs as ID*POSITION_STRIDE+position. None if the word
+        isn't in the index. """
+        decoded = self.decoded.get(word)
+        if decoded is None:
+            compressed = self.postings.get(word)
+            if compressed is None:
+                return None
+            offsets = numpy.zeros(compressed[1].size+1,dtype=numpy.int64)
+            numpy.cumsum(compressed[1],out=offsets[1:])
+            ids = numpy.cumsum(compressed[0],dtype=numpy.int64)
+            decoded = (ids, offsets, numpy.repeat(ids,compressed[1])*POSITION_STRIDE+compressed[2])
+            if len(self.decoded) >= MAX_DECODED:
+                self.decoded.clear()
+            self.decoded[word] = decoded
+        return decoded
+
+    def _wordIDs(self, word):
+        """ IDs of the Articles with the word. """
+        decoded = self._decode(word)
+        return numpy.zeros(0,dtype=numpy.int64) if decoded is None else decoded[0]
+
+    def _phraseIDs(self, words):
+        """ IDs of the Articles with the words next to each other, in this order. """
+        if not words:
+            return numpy.zeros(0,dtype=numpy.int64)
+        decoded = [self._decode(word) for word in words]
+        if any(d is None for d in decoded):
+            return numpy.zeros(0,dtype=numpy.int64)
+        if len(words)==1:
+            return decoded[0][0]
+
+        # Shift the positions of every word back by its place in the phrase, the phrase starts where they all coincide.
+        starts = decoded[0][2]
+        for j, d in enumerate(decoded[1:]):
+            starts = numpy.intersect1d(starts,d[2]-(j+1),assume_unique=True)
+        return numpy.unique(starts//POSITION_STRIDE)
+
+    def _score(self, ids, words):
+        """ tf-idf scores of the Articles with the given IDs for the given words. """
+        scores = numpy.zeros(ids.size)
+        for word in set(words):
+            decoded = self._decode(word)
+            if decoded is None:
+                continue
+            slots = numpy.searchsorted(decoded[0],ids)
+            slots[slots>=decoded[0].size] = 0
+            present = decoded[0][slots]==ids
+            counts = (decoded[1][slots+1]-decoded[1][slots])*present
+            scores += numpy.log1p(counts)*math.log(1.+self.noArticles/float(decoded[0].size))
+        return scores
+
+    def search(self, query, rankBy='citations', limit=None):
+        """ Find the Articles that match a query.
+
+        Arguments
+        ----------
+        query - str with the query. Words have to all appear in an Article
+            (AND), unless separated by OR. Words prefixed with - must not
+            appear. Words in double quotes have to appear as a phrase.
+            E.g. 'langmuir "plasma sheath" -dust OR collector'.
+        rankBy - str, 'citations' to put the most cited Articles first, 'score'
+            to put the Articles with the highest tf-idf first, or None to
+            return them in the order of their IDs.
+        limit - int or None, return at most this many Articles.
+
+        Returns
+        ----------
+        list of ints with the IDs of the matching Articles.
+        """
+        self._merge()
+        result = numpy.zeros(0,dtype=numpy.int64)
+        scoreWords = [] # Positive words, used for scoring.
+        for clause in re.split('\s+OR\s+',query.strip()):
+            include, exclude = None, []
+            for item in QueryPattern.findall(clause):
+                negate = item.startswith('-')
+                item = item.lstrip('-')
+                words = tokenise(item)
+                if not words: # Punctuation, e.g. &, doesn't narrow anything down.
+                    continue
+                if item.startswith('"'):
+                    ids = self._phraseIDs(words)
+                else: # One word, possibly split by punctuation - treat it as a phrase then.
+                    ids = self._wordIDs(words[0]) if len(words)==1 else self._phraseIDs(words)
+                if negate:
+                    exclude.append(ids)
+                else:
+                    scoreWords.extend(words)
+                    include = ids if include is None else numpy.intersect1d(include,ids,assume_unique=True)
+            if include is None: # Only exclusions, not much sense in that.
+                continue
+            for ids in exclude:
+                include = numpy.setdiff1d(include,ids,assume_unique=True)
+            result = numpy.union1d(result,include)
+
+        if rankBy=='citations':
+            result = result[numpy.argsort(-self.citations[result],kind='mergesort')]
+        elif rankBy=='score':
+            result = result[numpy.argsort(-self._score(result,scoreWords),kind='mergesort')]
+        elif rankBy is not None:
+            raise ValueError("Unknown ranking {}, use 'citations', 'score' or None.".format(rankBy))
+        return result[:limit].tolist()
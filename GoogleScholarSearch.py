@@ -8,8 +8,8 @@ I've updated it to BeautifulSoup4 and current syntax of Google Scholar source.
 Also started saving the results in a class object for compatibility with other code.
 
 @author: Alek
-@version: 1.0.6
-@since: Wed 22 Jun 2016
+@version: 1.0.17
+@since: Mon 19 Oct 2026
 
 CHANGELOG:
 Sat  3 Oct 2015 - 1.0.0 - Alek - Issued the first version based on a class from the Internet.
@@ -19,12 +19,32 @@ Sat 11 Jun 2016 - 1.0.3 - Alek - Explicitly specified a parser for BeautifulSoup
                 - 1.0.4 - Alek - Raise RuntimeError when getArticlesFromPage finds no Articles.
                 - 1.0.5 - Alek - Use BeautifulSoup to get the articles' titles.
 Wed 22 Jun 2016 - 1.0.6 - Alek - Started to convert from unicode to str when creating Articles. 
+Mon 19 Oct 2026 - 1.0.7 - Alek - Classify the page with PageClassifier before parsing it, raise CaptchaError when blocked.
+                - 1.0.8 - Alek - Default pubNoCitations to 0 when there's no "Cited by" link.
+                - 1.0.9 - Alek - Time fetching and parsing with CrawlMetrics.
+                - 1.0.10 - Alek - Parse the bytes of the response without decoding them to ASCII first.
+                - 1.0.11 - Alek - Optionally cache the results of the queries in a QueryCache.
+                - 1.0.12 - Alek - Allow getArticlesFromPage to skip the QueryCache and get the current results.
+                - 1.0.13 - Alek - Get the pages with a FetchBackends.FetchBackend instead of httplib.
+                - 1.0.14 - Alek - Parse the authors, journals and years of all the Articles on a page at once with parseAuthorLines.
+                - 1.0.15 - Alek - Give the Articles the caller's search terms, only normalise them for the URL.
+                - 1.0.16 - Alek - Also give the caller's search terms to the Articles from the QueryCache.
+                - 1.0.17 - Alek - Stop timing the parsing also when it fails.
 """
-import httplib, urllib, re
+import urllib, re, HTMLParser, numpy
 from bs4 import BeautifulSoup
-import Article
+import Article, PageClassifier, CrawlMetrics, QueryCache, FetchBackends
 
 IntegerPattern = re.compile('\s+\d+\s*') # Expects at least one whitespace in front the integer. May be followed by a whtitespace too.
+# One line of authors, venue and host, e.g. 'J Smith, A Jones - Journal of X, 2010 - elsevier.com', with the
+# whitespace collapsed to single spaces. Any of the parts may be missing, the year is the last word of the venue.
+AuthorLinePattern = re.compile(r"""^(?P<authors>.*?) # Up to the first separator.
+    (?:\ -\ (?![\w.-]+\.[a-z]{2,}$) # The venue, unless all that's left is the host.
+        (?P<journal>.*?)(?:,?\ ?\b(?P<year>(?:1[5-9]|20)\d\d))?)?
+    (?:\ -\ (?P<host>(?:(?!\ -\ ).)*))?$""", re.X|re.M)
+AuthorLineHTMLPattern = re.compile('<div class="gs_a">(.*?)</div>', re.S) # The line in the page source, @see findAuthorLines.
+TagPattern = re.compile('<[^>]*>')
+NO_YEAR = 9999 # Year of the Articles that don't have one.
 
 headers = {'User-Agent': 'Mozilla/5.0', # Just pretend to be a Mozilla. (X11; Linux x86_64) AppleWebKit/537.11 (KHTML, like Gecko) Chrome/23.0.1271.64 Safari/537.11
    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -33,6 +53,73 @@ headers = {'User-Agent': 'Mozilla/5.0', # Just pretend to be a Mozilla. (X11; Li
    'Accept-Language': 'en-US,en;q=0.8',
    'Connection': 'keep-alive'}
        
+def parseAuthorLines(authorLines):
+    """ Get the authors, journals, years and venue URLs out of the green lines
+    under the titles of the Articles (<div class="gs_a">) on a whole page, or
+    many pages, at once. The lines are joined and AuthorLinePattern goes over
+    all of them in one pass, so the result comes out column by column.
+
+    Arguments
+    ----------
+    authorLines - list of str or unicode with the text of the lines.
+
+    Returns
+    ----------
+    dict with the columns, one entry per line, in the format of
+        ArticleStore.loadColumns:
+        * Authors - list of lists of UTF-8 str, split at the commas like they
+          always were, so that the Articles compare equal to the ones parsed before,
+        * Journal - list of UTF-8 str, empty if the line has no venue,
+        * Year - numpy.ndarray of int64, NO_YEAR if the line has no year,
+        * venueURL - list of UTF-8 str with the host, e.g. 'elsevier.com',
+          'Unavailable' if the line doesn't have it.
+    """
+    # Collapse the whitespace, incl. the non-breaking spaces around the separators, and the line breaks.
+    lines = [u' '.join(line.split()) if isinstance(line,unicode) else u' '.join(line.decode('utf-8','replace').split())
+        for line in authorLines]
+    matches = AuthorLinePattern.findall(u'\n'.join(lines).encode('utf-8')) if lines else []
+    if len(matches)!=len(lines): # Every line matches, all the parts are optional.
+        raise RuntimeError("Parsed {} author lines out of {}.".format(len(matches),len(lines)))
+    authors, journals, years, hosts = zip(*matches) if matches else ([],[],[],[])
+
+    yearColumn = numpy.full(len(years),NO_YEAR,dtype=numpy.int64)
+    years = numpy.array(years,dtype=str)
+    found = years!=''
+    yearColumn[found] = years[found].astype(numpy.int64)
+    return {'Authors': [a.split(',') for a in authors], 'Journal': list(journals), 'Year': yearColumn,
+        'venueURL': [host or 'Unavailable' for host in hosts]}
+
+def setAuthorLines(articles, authorLines):
+    """ Set the Authors, Journal and Year of Articles from their author lines,
+    @see parseAuthorLines.
+
+    Arguments
+    ----------
+    articles - list of Articles.
+    authorLines - list of str or unicode with the author line of every Article.
+    """
+    columns = parseAuthorLines(authorLines)
+    years = columns['Year'].tolist() # Python ints, not numpy.int64s.
+    for i, art in enumerate(articles):
+        art.Authors = columns['Authors'][i]
+        art.Journal = columns['Journal'][i]
+        art.Year = years[i]
+
+def findAuthorLines(source):
+    """ Get the text of the author lines straight from the source of a results
+    page, without parsing its HTML, e.g. to re-parse the metadata of a whole cache.
+
+    Arguments
+    ----------
+    source - str with the page source.
+
+    Returns
+    ----------
+    list of unicode with the text of every <div class="gs_a"> on the page.
+    """
+    unescape = HTMLParser.HTMLParser().unescape # Turns the &amp; etc. back into characters.
+    return [unescape(TagPattern.sub('',line).decode('utf-8','replace')) for line in AuthorLineHTMLPattern.findall(source)]
+
 class GoogleScholarSearchEngine:
     """ This class searches Google Scholar (http://scholar.google.com)
 
@@ -46,11 +133,20 @@ class GoogleScholarSearchEngine:
     > searcher.search(['breast cancer', 'gene'])
     </tt>
     """
-    def __init__(self):
-        """  Empty initialiser.
+    def __init__(self, queryCache=None, backend=None):
+        """  Initialise the search engine.
+        
+        Arguments
+        ----------
+        @param queryCache - QueryCache.QueryCache or None, where to cache the
+            Articles found on every results page; nothing is cached if None.
+        @param backend - FetchBackends.FetchBackend that gets the results pages,
+            a new FetchBackends.HTTPBackend if None.
         """
         self.SEARCH_HOST = "scholar.google.com"
         self.SEARCH_BASE_URL = "/scholar"
+        self.queryCache = queryCache
+        self.backend = FetchBackends.HTTPBackend() if backend is None else backend
 
     def search(self, searchTerms, limit=10):
         """ Searches Google Scholar using the specified terms.
@@ -90,11 +186,12 @@ class GoogleScholarSearchEngine:
         ----------
         IOError when the connection to Google Scholar cannot be established.
         """
-        params = urllib.urlencode({'q': "+".join(searchTerms), 'num': limit})
+        queryTerms = QueryCache.normaliseSearchTerms(searchTerms) # Same query, same URL - can use the cached results.
+        params = urllib.urlencode([('q', "+".join(queryTerms)), ('num', limit)])
         url = self.SEARCH_BASE_URL+"?"+params # URL of the actual search with all the terms.
         return self.getArticlesFromPage( url, searchTerms)
         
-    def getArticlesFromPage(self, url, searchTerms):
+    def getArticlesFromPage(self, url, searchTerms, readCache=True):
         """ Parses a given Google Scholar results page and returns a list of 
         Articles that are displayed there. This can be used to find citing or 
         related Articles using the citingArticlesURL or relatedArticlesURL fields.
@@ -125,6 +222,9 @@ class GoogleScholarSearchEngine:
         @param url - str, URL to be appended to the self.SEARCH_HOST (i.e. scholar.google.com)
             to get to the results page (example: /scholar?q=related:X7dZ0Xg524gJ:scholar.google.com/&hl=en&as_sdt=0,5)
         @param searchTerms - list of strings that we'll search for.
+        @param readCache - bool, whether to use the results from the queryCache.
+            The results are cached either way, so False gets the current
+            results, e.g. the current no. citations, and updates the cache.
         
         Returns
         ----------
@@ -135,109 +235,115 @@ class GoogleScholarSearchEngine:
         ----------
         IOError when the connection to Google Scholar cannot be established.
         RuntimeError - when no articles are found.
+        PageClassifier.CaptchaError - when Google Scholar wants us to show we're
+            not a robot.
         """
-        conn = httplib.HTTPConnection(self.SEARCH_HOST, timeout=30)
-        conn.request("GET", url, body=None, headers=headers)
-        resp = conn.getresponse()
+        cacheKey = self.SEARCH_HOST+url
+        if self.queryCache is not None and readCache: # Maybe we've seen this page recently.
+            results = self.queryCache.get(cacheKey)
+            if results is not None:
+                CrawlMetrics.increment('queryCacheHits')
+                for art in results: # Cached with the search terms of whoever got the page first.
+                    art.Keywords = searchTerms
+                return results
+        
+        with CrawlMetrics.stage('fetch'):
+            resp = self.backend.fetch("http://"+self.SEARCH_HOST+url, headers)
+            html = resp.body
         results = [] # The list of Articles we'll return.
         
         if resp.status==302: # We got a redirect.
-            pass#print resp.geturl() # TODO handle this
+            if 'sorry' in (resp.getheader('location') or ''): # Redirected to Google's block page.
+                raise PageClassifier.CaptchaError("Redirected to a captcha page with URL: {}".format(url))
             print "Got error 302 - redirection."
         elif resp.status==200:
-            html = resp.read()
-            html = html.decode('ascii', 'ignore') # Raw HTML file of the website with the search results.
+            # Don't bother parsing pages that won't have any articles.
+            pageClass = PageClassifier.classifyPage(html)
+            CrawlMetrics.increment('pages_'+pageClass)
+            if pageClass==PageClassifier.PAGE_CAPTCHA:
+                raise PageClassifier.CaptchaError("Got a captcha page with URL: {}".format(url))
+            elif pageClass!=PageClassifier.PAGE_RESULTS:
+                raise RuntimeError("No articles found with URL: {}, source:\n{}".format(url,html))
+            
             # Screen-scrape the result to obtain the publication information
-            soup = BeautifulSoup(html, "lxml")
+            parseStage = CrawlMetrics.stage('parse').start()
+            try:
+                soup = BeautifulSoup(html, "lxml") # Raw bytes of the page, lxml works out the encoding.
             
-            for record in soup.find_all('div',{'class': 'gs_r'}):#soup('p', {'class': 'g'}):
-            #TODO this could work better:
-            # work with record.find('div',{'class': 'gs_ri'}), which filters out full view and full text links
-            #title,pubURL in: record.find_all('div',{'class': 'gs_ri'})[0].find_all('h3',{'class': 'gs_rt'})
+                authorLines = [] # Green lines with the authors, journals and years of the Articles.
+                for record in soup.find_all('div',{'class': 'gs_r'}):#soup('p', {'class': 'g'}):
+                #TODO this could work better:
+                # work with record.find('div',{'class': 'gs_ri'}), which filters out full view and full text links
+                #title,pubURL in: record.find_all('div',{'class': 'gs_ri'})[0].find_all('h3',{'class': 'gs_rt'})
                 
-            #authors,journal,year record.find_all('div',{'class': 'gs_ri'})[0].find_all('div',{'class': 'gs_a'})
-#                authorsPart=record.find('div',{'class': 'gs_ri'}).find('div',{'class': 'gs_a'})
-            #abstract record.find_all('div',{'class': 'gs_ri'})[0].find_all('div',{'class': 'gs_rs'})
-#                abstractPart=record.find('div',{'class': 'gs_ri'}).find('div',{'class': 'gs_rs'})
-                if "[CITATION]" in record.text: # This isn't an actual article.
-                    continue
-                else:
-                    allAs = record.find_all('a') # All <a></a> fields corresponding to this article.
+                #authors,journal,year record.find_all('div',{'class': 'gs_ri'})[0].find_all('div',{'class': 'gs_a'})
+    #                authorsPart=record.find('div',{'class': 'gs_ri'}).find('div',{'class': 'gs_a'})
+                #abstract record.find_all('div',{'class': 'gs_ri'})[0].find_all('div',{'class': 'gs_rs'})
+    #                abstractPart=record.find('div',{'class': 'gs_ri'}).find('div',{'class': 'gs_rs'})
+                    if "[CITATION]" in record.text: # This isn't an actual article.
+                        continue
+                    else:
+                        allAs = record.find_all('a') # All <a></a> fields corresponding to this article.
     
-                    " Get the public URL and the title, maybe full text URL if we're lucky. "
-                    titleURLPart=record.find('div',{'class': 'gs_ri'}).find('h3',{'class': 'gs_rt'})
-                    pubURL=titleURLPart.find('a').get('href')
-                    pubTitle=titleURLPart.find('a').get_text()
+                        " Get the public URL and the title, maybe full text URL if we're lucky. "
+                        titleURLPart=record.find('div',{'class': 'gs_ri'}).find('h3',{'class': 'gs_rt'})
+                        pubURL=titleURLPart.find('a').get('href')
+                        pubTitle=titleURLPart.find('a').get_text()
                     
-                    if len( allAs[0].find_all("span") ): # The first <a> has some <span> children.
-                        fullURL = allAs[0].attrs['href'] # URL to the full text in HTML or PDF format (typically).
-                    else: # The first <a> of the result is the one with the title and public URL.
-                        fullURL = "Unavailable" # No full text for this article... :(
+                        if len( allAs[0].find_all("span") ): # The first <a> has some <span> children.
+                            fullURL = allAs[0].attrs['href'] # URL to the full text in HTML or PDF format (typically).
+                        else: # The first <a> of the result is the one with the title and public URL.
+                            fullURL = "Unavailable" # No full text for this article... :(
                     
-                    " Get the articles citing and related to this one. "
-                    citingArticlesURL = "UNKNOWN" # Initialise in case something goes wrong in parsing and this will be undefined.
-                    relatedArticlesURL = "UNKNOWN"#TOOO these won't always be found, why?
-                    for a in allAs:
-                        if "Cited by" in a.text:
-                            pubNoCitations = int(  IntegerPattern.findall(a.text)[0] )
-                            citingArticlesURL = a.attrs['href'] # Articles that cite this one.
-                        elif "Related articles" in a.text:
-                            relatedArticlesURL = a.attrs['href'] # URL to the related articles.
+                        " Get the articles citing and related to this one. "
+                        citingArticlesURL = "UNKNOWN" # Initialise in case something goes wrong in parsing and this will be undefined.
+                        relatedArticlesURL = "UNKNOWN"#TOOO these won't always be found, why?
+                        pubNoCitations = 0 # Articles that nobody cites don't have the "Cited by" link.
+                        for a in allAs:
+                            if "Cited by" in a.text:
+                                pubNoCitations = int(  IntegerPattern.findall(a.text)[0] )
+                                citingArticlesURL = a.attrs['href'] # Articles that cite this one.
+                            elif "Related articles" in a.text:
+                                relatedArticlesURL = a.attrs['href'] # URL to the related articles.
                     
-                    " Get the authors; they're displayed in green, use it. "
-                    authorPart = record.find('div',attrs={'class':'gs_a'}).text #record.first('font', {'color': 'green'}).string
-                    if authorPart is None:    
-                        authorPart = ''
-                        # Sometimes even BeautifulSoup can fail, fall back to regex.
-                        m = re.findall('<font color="green">(.*)</font>', str(record))
-                        if len(m)>0:
-                            authorPart = m[0]
+                        " Get the authors; they're displayed in green, use it. "
+                        authorPart = record.find('div',attrs={'class':'gs_a'}).text #record.first('font', {'color': 'green'}).string
+                        if authorPart is None:    
+                            authorPart = ''
+                            # Sometimes even BeautifulSoup can fail, fall back to regex.
+                            m = re.findall('<font color="green">(.*)</font>', str(record))
+                            if len(m)>0:
+                                authorPart = m[0]
     
-                    " Get journal name, publication year, and authors' list. "
-                    # Assume that the fields are delimited by ' - ', the first entry will be the
-                    # list of authors, the last entry is the journal URL. We also have journal name and year there.
-                    try: #TODO this IntegerPattern will sometimes fail here.
-                        pubJournalYear = int(IntegerPattern.findall(authorPart)[0]) # We might get other integers, but not preceded by whitespaces.
-                    except IndexError:
-                        print authorPart
-                        pubJournalYear=9999
-                    
-                    idx_start = authorPart.find(' - ') # Here the authors' list ends.
-                    idx_end = authorPart.rfind(' - ') # Here the journal's public URL starts.
-                    idx_jrnlNameEnd = authorPart.rfind(',') # After the journal name.
+                        authorLines.append(authorPart) # Parsed together with the other Articles' ones after the loop.
                     
-                    pubJournalName = authorPart[idx_start:idx_jrnlNameEnd].lstrip().lstrip("-")
-                    
-                    pubAuthors = authorPart[:idx_start]                
-                    pubJournalURL = authorPart[idx_end + 3:]
-                    # If (only one ' - ' is found) and (the end bit contains '\d\d\d\d')
-                    # then the last bit is journal year instead of journal URL
-                    if pubJournalYear=='' and re.search('\d\d\d\d', pubJournalURL)!=None:
-                        pubJournalYear = pubJournalURL
-                        pubJournalURL = 'Unavailable'
-                    
-                    " Get the abstract. "
-                    abstractDiv = record.find('div',attrs={'class':'gs_rs'}) # Abstract info sits here.
-                    if not abstractDiv is None:
-                        pubAbstract = abstractDiv.text
-                    else:
-                        pubAbstract = "Abstract unavailable"
-                        print record#TODO see why this might trigger and maybe filter out such cases
-                            # Sometimes there simply is no abstract?
-                        print "-"*10
+                        " Get the abstract. "
+                        abstractDiv = record.find('div',attrs={'class':'gs_rs'}) # Abstract info sits here.
+                        if not abstractDiv is None:
+                            pubAbstract = abstractDiv.text
+                        else:
+                            pubAbstract = "Abstract unavailable"
+                            print record#TODO see why this might trigger and maybe filter out such cases
+                                # Sometimes there simply is no abstract?
+                            print "-"*10
                     
-                    " Save the results. "
-                    results.append( Article.Article(pubTitle.encode('utf-8'),map(lambda x: x.encode('utf-8'),pubAuthors.split(',')),pubJournalYear,pubJournalName.encode('utf-8'),tagList=searchTerms,abstract=pubAbstract.encode('utf-8')) )
-                    # All the URLs.
-                    results[-1].fullURL = fullURL
-                    results[-1].pubURL = pubURL
-                    results[-1].citingArticlesURL = citingArticlesURL
-                    results[-1].relatedArticlesURL = relatedArticlesURL
-                    # This might be useful to something, e.g. seeing whcih publications have the most impact.
-                    results[-1].pubNoCitations = pubNoCitations
+                        " Save the results. "
+                        results.append( Article.Article(pubTitle.encode('utf-8'),[],NO_YEAR,'',tagList=searchTerms,abstract=pubAbstract.encode('utf-8')) )
+                        # All the URLs.
+                        results[-1].fullURL = fullURL
+                        results[-1].pubURL = pubURL
+                        results[-1].citingArticlesURL = citingArticlesURL
+                        results[-1].relatedArticlesURL = relatedArticlesURL
+                        # This might be useful to something, e.g. seeing whcih publications have the most impact.
+                        results[-1].pubNoCitations = pubNoCitations
+                setAuthorLines(results,authorLines)
+            finally: # Don't leave the stage open when a record can't be parsed.
+                parseStage.stop()
             
             if len(results)==0: # Check if we got any articles in the end.
                 raise RuntimeError("No articles found with URL: {}, source:\n{}".format(url,html))
+            if self.queryCache is not None:
+                self.queryCache.put(cacheKey,results)
         else:
             raise IOError("Connection can't be established. Error code: {}, Reason: {}".format(resp.status,resp.reason))
         
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Quickly tell what kind of a page Google Scholar has sent back before spending
+time on parsing it with BeautifulSoup. Only looks at small windows of the
+source - the top of the page, where Google's "sorry" pages identify themselves,
+and the start of the page body, where the results or the captcha form live.
+Scholar puts tens of kB of inline CSS and JavaScript in front of the body,
+so the body window is anchored at the body <div> rather than at byte 0.
+
+The class of the page also decides how long to wait before sending the next
+request, @see getBackoffTime.
+
+@author: Alek
+@version: 1.0.1
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Memory-map the cached pages, classify them without reading them.
+"""
+import random, os, mmap, contextlib
+
+" Possible classes of the pages. "
+PAGE_RESULTS = 'results' # A page with at least one result record.
+PAGE_CAPTCHA = 'captcha' # Google wants us to show we're not a robot.
+PAGE_EMPTY = 'empty' # A valid Scholar page but without any results.
+PAGE_ERROR = 'error' # Nothing, truncated source, or not a Scholar page at all.
+
+HEAD_SIZE = 4096 # No. characters at the top of the page to look at.
+BODY_WINDOW_SIZE = 4096 # No. characters after the start of the body to look at.
+
+BODY_MARKER = 'id="gs_bdy"' # The main part of the Scholar page starts here.
+RESULT_MARKERS = ['class="gs_r', 'class="gs_ri"'] # Every result record has one of these.
+CAPTCHA_MARKERS = ['gs_captcha', "not a robot"] # Scholar's own captcha form.
+SORRY_MARKERS = ['/sorry/', 'unusual traffic'] # Google-wide block page, much shorter than Scholar pages.
+
+" Backoff settings, in seconds. "
+BACKOFF_RESULTS = (60, 120) # Random wait from this bracket after a successful request.
+BACKOFF_BASE = 120 # Wait after the first failed request; doubled for every subsequent one.
+BACKOFF_MAX = 3600 # Never wait longer than this.
+
+class CaptchaError(RuntimeError):
+    """ Raised when Google Scholar responds with a captcha or a block page
+    instead of the results. Subclass of RuntimeError so that the existing
+    error handling still catches it.
+    """
+    pass
+
+def classifyPage(source, headSize=HEAD_SIZE, windowSize=BODY_WINDOW_SIZE):
+    """ Classify the source of a Google Scholar page without parsing it.
+
+    Arguments
+    ----------
+    source - str, unicode or mmap.mmap with the HTML source of the page, e.g.
+        the response body or a cache file opened with openCachedPage.
+    headSize - int, how many characters at the top of the page to look at.
+    windowSize - int, how many characters after the start of the page body
+        to look at.
+
+    Returns
+    ----------
+    One of PAGE_RESULTS, PAGE_CAPTCHA, PAGE_EMPTY, or PAGE_ERROR.
+    """
+    head = source[:headSize] # Slicing an mmap only copies the slice.
+    if not head.strip():
+        return PAGE_ERROR
+
+    for marker in SORRY_MARKERS:
+        if marker in head:
+            return PAGE_CAPTCHA
+
+    bodyIdx = source.find(BODY_MARKER)
+    if bodyIdx==-1: # Not a Scholar results layout, or the source got cut off before the body.
+        tail = source[max(0,len(source)-windowSize):]
+        for marker in CAPTCHA_MARKERS: # Could still be a block page with a different layout.
+            if marker in head or marker in tail:
+                return PAGE_CAPTCHA
+        return PAGE_ERROR
+
+    window = source[bodyIdx:bodyIdx+windowSize]
+    for marker in CAPTCHA_MARKERS:
+        if marker in window:
+            return PAGE_CAPTCHA
+
+    for marker in RESULT_MARKERS: # The results list can be further down, but it's still a plain substring search.
+        if source.find(marker,bodyIdx)!=-1:
+            return PAGE_RESULTS
+
+    return PAGE_EMPTY
+
+def classifyFile(fileName, headSize=HEAD_SIZE, windowSize=BODY_WINDOW_SIZE):
+    """ Classify a cached page, @see classifyPage.
+
+    Arguments
+    ----------
+    fileName - str with the path to the file with the page source.
+    headSize, windowSize - @see classifyPage.
+
+    Returns
+    ----------
+    One of PAGE_RESULTS, PAGE_CAPTCHA, PAGE_EMPTY, or PAGE_ERROR.
+
+    Raises
+    ----------
+    IOError if the file cannot be read.
+    """
+    with openCachedPage(fileName) as page:
+        return classifyPage(page,headSize,windowSize)
+
+@contextlib.contextmanager
+def openCachedPage(fileName):
+    """ Memory-map a cached page, so that it can be classified without reading
+    all of it, @see classifyPage. Use page[:] to get a str with all of it.
+
+    Arguments
+    ----------
+    fileName - str with the path to the file with the page source.
+
+    Yields
+    ----------
+    mmap.mmap with the contents of the file, or an empty str if it's empty.
+
+    Raises
+    ----------
+    IOError if the file cannot be opened.
+    """
+    with open(fileName,"rb") as cacheFile:
+        if os.fstat(cacheFile.fileno()).st_size==0: # Can't mmap empty files.
+            yield ''
+        else:
+            page = mmap.mmap(cacheFile.fileno(),0,access=mmap.ACCESS_READ)
+            try:
+                yield page
+            finally:
+                page.close()
+
+def getBackoffTime(pageClass, noFailures=0):
+    """ Decide how long to wait before sending the next request to Google
+    Scholar, given the class of the last page that came back.
+
+    Arguments
+    ----------
+    pageClass - one of PAGE_RESULTS, PAGE_CAPTCHA, PAGE_EMPTY, or PAGE_ERROR.
+    noFailures - int, how many captcha or error pages we've had in a row,
+        including this one.
+
+    Returns
+    ----------
+    int with the number of seconds to wait.
+    """
+    if pageClass in (PAGE_RESULTS, PAGE_EMPTY): # Everything's fine, just don't send requests too quickly.
+        return random.randint(BACKOFF_RESULTS[0],BACKOFF_RESULTS[1]-1)
+    else: # Blocked or broken - back off exponentially, with some jitter so we don't look like a bot.
+        dt = BACKOFF_BASE*2**max(0,noFailures-1)
+        return min(BACKOFF_MAX, dt+random.randint(0,BACKOFF_BASE-1))
+
+if __name__ == '__main__':
+    # The captcha page we got once, keep checking we recognise it.
+    print "captchaSrc: {}".format(classifyFile('captchaSrc'))
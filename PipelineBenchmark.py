@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Measure how the analysis in DownloadArticles scales with the number of
+Articles: findNGrams, getArticleKeywords, collectArticleFeatures, and picking
+the no. clusters with KMeans and the silhouette score like the __main__ does.
+The Articles are synthetic, with titles and abstracts drawn from a vocabulary
+with a Zipf-Mandelbrot distribution of word frequencies, like real text, whose
+most common words are the English function words.
+
+Every stage is timed and its peak memory is recorded, i.e. how much the
+resident memory grew while it ran. The results are saved as JSON, which can
+be used as a baseline for the later runs to detect regressions. Stages that
+would take longer or need more memory than allowed, extrapolating from the
+smaller corpora, are skipped.
+
+Run from the command line:
+    python PipelineBenchmark.py --sizes 1000 10000 100000 1000000 --save baseline.json
+    python PipelineBenchmark.py --compare baseline.json
+
+@author: Alek
+@version: 1.0.0
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+"""
+import sys, time, json, math, platform, argparse, resource, numpy, nltk, sklearn, sklearn.cluster, sklearn.metrics
+import Article, DownloadArticles, FakeScholarServer
+
+FORMAT_VERSION = 1
+STAGES = ['findNGrams', 'getArticleKeywords', 'collectArticleFeatures', 'clustering'] # In the order they're run.
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+STATUS_OK = 'ok'
+STATUS_SKIPPED = 'skipped'
+STATUS_FAILED = 'failed'
+
+" Most common words in the titles and abstracts, in the order of their frequencies. "
+FUNCTION_WORDS = ['of','the','and','in','a','for','on','with','to','by','an','from','using','at','as','its','between','under','is','are']
+
+def generateVocabulary(size, seed=0):
+    """ Make a vocabulary for the synthetic corpora.
+
+    Arguments
+    ----------
+    size - int, how many words.
+    seed - int, seed of the random number generator.
+
+    Returns
+    ----------
+    numpy.ndarray of str with the words, most frequent first: the function
+        words, the words of FakeScholarServer's titles, and then made-up ones.
+    """
+    rng = numpy.random.RandomState(seed)
+    words = FUNCTION_WORDS+FakeScholarServer.TITLE_WORDS
+    known = set(words)
+    letters = numpy.array(list('abcdefghijklmnoprstuvwy'))
+    while len(words) < size:
+        word = ''.join(letters[rng.randint(0,letters.size,rng.randint(3,11))])
+        if word not in known:
+            known.add(word)
+            words.append(word)
+    return numpy.array(words[:size],dtype=object)
+
+def generateCorpus(noArticles, vocabularySize=50000, exponent=1.1, titleLength=(5,15), abstractLength=(100,250),
+                   seed=0, chunkSize=10000):
+    """ Make synthetic Articles with titles and abstracts.
+
+    Arguments
+    ----------
+    noArticles - int, how many Articles.
+    vocabularySize - int, no. distinct words.
+    exponent - float, exponent of the Zipf-Mandelbrot distribution, the r-th
+        most common word has a frequency proportional to 1/(r+2.7)**exponent.
+    titleLength, abstractLength - 2-tuples of ints with the smallest and
+        largest no. words; the abstracts are empty if abstractLength is None.
+    seed - int, seed of the random number generator, the same seed gives
+        the same corpus.
+    chunkSize - int, no. Articles whose words are drawn at once.
+
+    Returns
+    ----------
+    list of Articles.
+    """
+    rng = numpy.random.RandomState(seed)
+    vocabulary = generateVocabulary(vocabularySize,seed)
+    cumulative = numpy.cumsum(1./(numpy.arange(vocabularySize)+2.7)**exponent)
+    cumulative /= cumulative[-1]
+
+    def drawTexts(lengths):
+        """ Draw all the words at once and split them into texts. """
+        words = vocabulary[numpy.searchsorted(cumulative,rng.random_sample(lengths.sum()))]
+        ends = numpy.cumsum(lengths).tolist()
+        return [' '.join(words[start:end]) for start,end in zip([0]+ends[:-1],ends)]
+
+    articles = []
+    for start in xrange(0,noArticles,chunkSize):
+        n = min(chunkSize,noArticles-start)
+        titles = drawTexts(rng.randint(titleLength[0],titleLength[1]+1,n))
+        abstracts = ['']*n if abstractLength is None else drawTexts(rng.randint(abstractLength[0],abstractLength[1]+1,n))
+        years = rng.randint(1920,2017,n).tolist()
+        for i in xrange(n):
+            title = titles[i].capitalize()
+            articles.append(Article.Article(title,['A Author'],years[i],'Journal',abstract=abstracts[i]))
+    return articles
+
+def _readMemory(name):
+    """ Get a memory figure of this process from /proc in MB, e.g. VmRSS or
+    VmHWM. None if there's no /proc, e.g. not on Linux. """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(name+':'):
+                    return int(line.split()[1])/1024.
+    except IOError:
+        pass
+    return None
+
+def _resetPeakMemory():
+    """ Make the peak resident memory equal to the current one, so that the
+    peak of every stage can be measured. Only works on Linux.
+
+    Returns
+    ----------
+    bool, whether it worked.
+    """
+    try:
+        with open('/proc/self/clear_refs','w') as clearRefs:
+            clearRefs.write('5')
+        return True
+    except IOError:
+        return False
+
+def _availableMemory():
+    """ Get how much memory is available to the stages in MB, None if unknown. """
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1])/1024.
+    except IOError:
+        pass
+    return None
+
+def _measure(function, *args):
+    """ Run a function and measure how long it takes and how much memory.
+
+    Returns
+    ----------
+    3-tuple with whatever the function returns, float seconds and float MB
+        by which the resident memory grew at its peak (None if that can't be
+        measured).
+    """
+    exact = _resetPeakMemory()
+    before = _readMemory('VmRSS')
+    if not exact: # Can only see the peak of the whole process.
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024.
+    start = time.time()
+    result = function(*args)
+    seconds = time.time()-start
+    if exact:
+        peak = _readMemory('VmHWM')-before
+    elif before is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024.-before
+    else:
+        peak = None
+    return result, seconds, peak
+
+def _runStage(name, state):
+    """ Run one stage of the pipeline on the Articles in the state dict, and
+    put what the next stages need there. """
+    if name=='findNGrams':
+        tokens = state['tokens']
+        return DownloadArticles.findNGrams(tokens,lengths=[1,2,3])
+    elif name=='getArticleKeywords':
+        keywords, frequencies = DownloadArticles.getArticleKeywords(state['articles'],maxLength=3)
+        state['keywords'] = keywords[numpy.where(frequencies>1)] # Like the __main__ of DownloadArticles.
+    elif name=='collectArticleFeatures':
+        state['features'] = DownloadArticles.collectArticleFeatures(state['articles'],state['keywords'])
+    elif name=='clustering': # Same as the __main__ of DownloadArticles.
+        clusterSizes = range(2,4)
+        scores = []
+        for n_clusters in clusterSizes:
+            labels = sklearn.cluster.KMeans(n_clusters=n_clusters,random_state=0).fit_predict(state['features'])
+            scores.append(sklearn.metrics.silhouette_score(state['features'],labels))
+        sklearn.cluster.KMeans(n_clusters=clusterSizes[scores.index(max(scores))],random_state=0).fit_predict(state['features'])
+
+def _extrapolate(results, stage, noArticles, field):
+    """ Guess the value of a field of the results of a stage for noArticles,
+    from the two largest corpora it's been run on, assuming a power law.
+    None if it's not been run yet. """
+    done = sorted((r['noArticles'],r[field]) for r in results if r['stage']==stage and r['status']==STATUS_OK
+        and r[field] is not None and r[field] > 0)
+    if not done:
+        return None
+    n, value = done[-1]
+    exponent = 1.
+    if len(done) > 1 and done[-2][0] < n:
+        exponent = math.log(value/done[-2][1])/math.log(float(n)/done[-2][0])
+        exponent = min(3.,max(1.,exponent)) # Noise in the small corpora shouldn't make us too optimistic.
+    return value*(float(noArticles)/n)**exponent
+
+def runBenchmark(sizes=DEFAULT_SIZES, maxSeconds=600., maxMemory=None, withAbstracts=False, seed=0):
+    """ Run all the stages on corpora of the given sizes.
+
+    Arguments
+    ----------
+    sizes - list of ints with the no. Articles in the corpora.
+    maxSeconds - float, skip the stages that would take longer than this.
+    maxMemory - float, skip the stages that would need more MB than this;
+        the memory available at the start if None.
+    withAbstracts - bool, whether to give the Articles abstracts. None of
+        the stages use them, so they only take memory.
+    seed - int, seed for the corpora.
+
+    Returns
+    ----------
+    dict that can be saved as JSON, with the versions of the software and
+        a list of results - dicts with the stage, noArticles, status (one of
+        STATUS_OK, STATUS_SKIPPED, STATUS_FAILED), seconds, peakMemoryMB and
+        a note saying why the stage was skipped or failed.
+    """
+    maxMemory = _availableMemory() if maxMemory is None else maxMemory
+    benchmark = {'version':FORMAT_VERSION, 'created':time.strftime('%Y-%m-%dT%H:%M:%S'), 'seed':seed,
+        'platform':platform.platform(), 'python':platform.python_version(), 'numpy':numpy.__version__,
+        'nltk':nltk.__version__, 'sklearn':sklearn.__version__, 'maxSeconds':maxSeconds, 'maxMemory':maxMemory,
+        'results':[]}
+    results = benchmark['results']
+    for noArticles in sorted(sizes):
+        articles, seconds, peak = _measure(generateCorpus,noArticles,50000,1.1,(5,15),(100,250) if withAbstracts else None,seed)
+        print "{} articles generated in {:.1f} s.".format(noArticles,seconds)
+        state = {'articles':articles, 'tokens':[t for art in articles for t in nltk.wordpunct_tokenize(art.Title)]}
+        for stage in STAGES:
+            result = {'stage':stage, 'noArticles':noArticles, 'status':STATUS_OK, 'seconds':None, 'peakMemoryMB':None, 'note':''}
+            predictedSeconds = _extrapolate(results,stage,noArticles,'seconds')
+            predictedMemory = _extrapolate(results,stage,noArticles,'peakMemoryMB')
+            failedBefore = [r for r in results if r['stage']==stage and r['status']!=STATUS_OK]
+            needs = [s for s in STAGES[:STAGES.index(stage)] if s!='findNGrams'] # The other stages work on what these make.
+            if failedBefore:
+                result['status'], result['note'] = STATUS_SKIPPED, "Didn't run on a smaller corpus."
+            elif any(r['status']!=STATUS_OK for r in results if r['stage'] in needs and r['noArticles']==noArticles):
+                result['status'], result['note'] = STATUS_SKIPPED, "Needs the results of the previous stages."
+            elif predictedSeconds is not None and predictedSeconds > maxSeconds:
+                result['status'], result['note'] = STATUS_SKIPPED, "Would take about {:.0f} s.".format(predictedSeconds)
+            elif predictedMemory is not None and maxMemory is not None and predictedMemory > maxMemory:
+                result['status'], result['note'] = STATUS_SKIPPED, "Would need about {:.0f} MB.".format(predictedMemory)
+            else:
+                try:
+                    dummy, result['seconds'], result['peakMemoryMB'] = _measure(_runStage,stage,state)
+                except (MemoryError, LookupError, ValueError) as e: # E.g. no nltk stopwords, or too few keywords to cluster.
+                    result['status'], result['note'] = STATUS_FAILED, "{}: {}".format(type(e).__name__,str(e).strip().split('\n')[0])
+            results.append(result)
+            print "\t{stage:24s} {status:8s} {seconds} s {peakMemoryMB} MB {note}".format(**result)
+        del articles, state # Make room for the next corpus.
+    return benchmark
+
+def saveBenchmark(benchmark, fileName):
+    """ Save the results of runBenchmark as JSON. """
+    with open(fileName,'w') as output:
+        json.dump(benchmark,output,indent=2,sort_keys=True)
+
+def loadBenchmark(fileName):
+    """ Load the results saved with saveBenchmark. """
+    with open(fileName) as baseline:
+        return json.load(baseline)
+
+def compareWithBaseline(benchmark, baseline, tolerance=0.25, minSeconds=1.):
+    """ Find the stages that have got slower or need more memory than in the
+    baseline.
+
+    Arguments
+    ----------
+    benchmark, baseline - dicts returned by runBenchmark or loadBenchmark.
+    tolerance - float, relative increase that's still just noise.
+    minSeconds - float, ignore the stages that take less than this; their
+        timings are mostly noise.
+
+    Returns
+    ----------
+    list of dicts with the stage, noArticles, quantity ('seconds',
+        'peakMemoryMB' or 'status'), baseline and current values, and their
+        ratio, for all the regressions.
+    """
+    previous = dict(((r['stage'],r['noArticles']),r) for r in baseline['results'])
+    regressions = []
+    for result in benchmark['results']:
+        old = previous.get((result['stage'],result['noArticles']))
+        if old is None or old['status']!=STATUS_OK:
+            continue
+        if result['status']!=STATUS_OK: # Used to work.
+            regressions.append({'stage':result['stage'], 'noArticles':result['noArticles'], 'quantity':'status',
+                'baseline':old['status'], 'current':result['status'], 'ratio':None})
+            continue
+        for quantity, minimum in [('seconds',minSeconds), ('peakMemoryMB',1.)]:
+            if old[quantity] is None or result[quantity] is None or max(old[quantity],result[quantity]) < minimum:
+                continue
+            ratio = result[quantity]/max(old[quantity],1e-9)
+            if ratio > 1.+tolerance:
+                regressions.append({'stage':result['stage'], 'noArticles':result['noArticles'], 'quantity':quantity,
+                    'baseline':old[quantity], 'current':result[quantity], 'ratio':ratio})
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark how the keyword and clustering pipeline scales.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="No. articles in the corpora.")
+    parser.add_argument('--max-seconds', type=float, default=600., help="Skip the stages that would take longer.")
+    parser.add_argument('--max-memory', type=float, default=None, help="Skip the stages that would need more MB, available memory by default.")
+    parser.add_argument('--abstracts', action='store_true', help="Give the articles abstracts too.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the corpora.")
+    parser.add_argument('--save', default=None, help="Save the results as JSON here.")
+    parser.add_argument('--compare', default=None, help="Compare with the results saved here.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Relative slow-down that isn't a regression yet.")
+    args = parser.parse_args()
+
+    benchmark = runBenchmark(args.sizes, args.max_seconds, args.max_memory, args.abstracts, args.seed)
+    if args.save:
+        saveBenchmark(benchmark, args.save)
+    if args.compare:
+        regressions = compareWithBaseline(benchmark, loadBenchmark(args.compare), args.tolerance)
+        for r in regressions:
+            print "Regression: {stage} with {noArticles} articles, {quantity} {baseline} -> {current}".format(**r)
+        sys.exit(1 if regressions else 0)
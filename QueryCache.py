@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Cache the Articles found by Google Scholar queries, so that asking for the
+same title or search terms again doesn't cost another request, and another
+step towards a captcha. Recently used results are kept in memory in an LRU
+of limited size; optionally all of them are also kept in a shelve file, so
+they survive between runs. Every entry expires after its time-to-live.
+
+Results are stored pickled, so every get() returns a fresh copy of the
+Articles that can be modified without affecting the cache.
+
+Example
+----------
+<tt>
+> cache = QueryCache(fileName='queries.db', ttl=24*3600)\n
+> searcher = GoogleScholarSearch.GoogleScholarSearchEngine(queryCache=cache)\n
+> searcher.search(['langmuir', 'probe']) # Sends a request.\n
+> searcher.search(['Langmuir', ' probe']) # Doesn't.\n
+> cache.getStats()
+</tt>
+
+@author: Alek
+@version: 1.0.0
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+"""
+import time, shelve, collections, cPickle, threading
+
+DEFAULT_TTL = 7*24*3600 # Citation counts change, don't trust the results forever. In seconds.
+
+def normaliseSearchTerms(searchTerms):
+    """ Get the search terms in a canonical form, so that queries that only
+    differ in case or spacing end up with the same URL and cache entry.
+
+    Arguments
+    ----------
+    searchTerms - list of str with the search terms.
+
+    Returns
+    ----------
+    list of str with lower-case search terms with single spaces between words.
+    """
+    return [' '.join(term.lower().split()) for term in searchTerms if term.strip()]
+
+def _toKey(key):
+    """ shelve only accepts str keys. """
+    return key.encode('utf-8') if isinstance(key,unicode) else key
+
+class QueryCache(object):
+    """ LRU cache of lists of Articles with per-entry time-to-live, optionally
+    backed by a persistent shelve file.
+    """
+    def __init__(self, maxEntries=1000, ttl=DEFAULT_TTL, fileName=None, clock=time):
+        """
+        Arguments
+        ----------
+        maxEntries - int, most entries to keep in memory.
+        ttl - float, default time-to-live of the entries in seconds.
+        fileName - str or None, shelve file where all the entries are kept
+            too; only in memory if None.
+        clock - object with a time() method, e.g. the time module or a
+            FakeScholarServer.VirtualClock.
+        """
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = collections.OrderedDict() # Key -> (expiry time, pickled Articles), least recently used first.
+        self.store = None if fileName is None else shelve.open(fileName,protocol=cPickle.HIGHEST_PROTOCOL)
+        self.lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def get(self, key):
+        """ Get the Articles cached under the key.
+
+        Returns
+        ----------
+        list of Articles, or None if there's no such entry or it has expired.
+        """
+        key = _toKey(key)
+        now = self.clock.time()
+        with self.lock:
+            entry = self.entries.pop(key,None)
+            if entry is None and self.store is not None:
+                entry = self.store.get(key)
+                if entry is not None:
+                    self.stats['storeHits'] += 1
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if entry[0] < now: # Expired.
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                if self.store is not None and key in self.store:
+                    del self.store[key]
+                return None
+
+            self._remember(key,entry) # Most recently used now.
+            self.stats['hits'] += 1
+        return cPickle.loads(entry[1])
+
+    def put(self, key, articles, ttl=None):
+        """ Cache the Articles under the key.
+
+        Arguments
+        ----------
+        key - str, e.g. the URL of the results page.
+        articles - list of Articles.
+        ttl - float or None, time-to-live of this entry in seconds; the
+            default of the cache if None.
+        """
+        key = _toKey(key)
+        entry = (self.clock.time()+(self.ttl if ttl is None else ttl), cPickle.dumps(articles,cPickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            self.entries.pop(key,None)
+            self._remember(key,entry)
+            if self.store is not None:
+                self.store[key] = entry
+
+    def _remember(self, key, entry):
+        """ Put the entry at the most recently used end of the LRU and evict
+        the least recently used ones above maxEntries. Call with the lock held. """
+        self.entries[key] = entry
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def purge(self):
+        """ Remove all the expired entries, also from the persistent store. """
+        now = self.clock.time()
+        with self.lock:
+            for key in [k for k,e in self.entries.items() if e[0] < now]:
+                del self.entries[key]
+            if self.store is not None:
+                for key in [k for k in self.store.keys() if self.store[k][0] < now]:
+                    del self.store[key]
+
+    def getStats(self):
+        """ Get the statistics of the cache.
+
+        Returns
+        ----------
+        dict with the no. hits, misses, storeHits (hits that weren't in memory),
+            expired and evicted entries, entries in memory, and hitRate.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.entries)
+        for name in ['hits','misses','storeHits','expired','evicted']:
+            stats.setdefault(name,0)
+        stats['hitRate'] = stats['hits']/float(max(1,stats['hits']+stats['misses']))
+        return stats
+
+    def close(self):
+        """ Save and close the persistent store, if any. """
+        with self.lock:
+            if self.store is not None:
+                self.store.close()
+                self.store = None
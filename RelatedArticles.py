@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Find the related Articles offline, from the words the Articles have in
+common, instead of sending a request to Google Scholar's relatedArticlesURL
+for every one of them. Every Article is a sparse, L2-normalised feature vector
+- either the keyword matrix from DownloadArticles.collectArticleFeatures or
+the tf-idf of the words in the Titles, Abstracts and Keywords from
+buildFeatures - and its related Articles are the k with the highest cosine
+similarity. The similarities are computed as sparse matrix products of a
+block of rows at a time with all the Articles, so only the Articles that
+share at least one feature are ever compared and the dense NxN matrix of
+similarities is never built.
+
+Example
+----------
+<tt>
+> features, words = buildFeatures(allArticles)\n
+> related = RelatedArticles(features, k=10)\n
+> related.getRelated(0)\n
+> similar = related.getSimilarityGraph(minSimilarity=0.3) # Overlay on the citation network.\n
+> networkx.draw_networkx_edges(similar, poses, style='dashed', ax=ax)
+</tt>
+
+@author: Alek
+@version: 1.0.1
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Optionally get the tokens for buildFeatures from a TextResources.TokenCache.
+"""
+import numpy, scipy.sparse, sklearn.preprocessing, networkx
+import FullTextIndex
+
+def buildFeatures(articles, fields=FullTextIndex.FIELDS, minCount=2, maxFraction=0.1, tokenCache=None):
+    """ Get the tf-idf features of the words in the Articles.
+
+    Arguments
+    ----------
+    articles - list of Articles.
+    fields - list of str with the attributes of the Articles to use.
+    minCount - int, ignore the words that appear in fewer Articles than
+        this, they can't make any two Articles similar anyway.
+    maxFraction - float, ignore the words that appear in more than this
+        fraction of the Articles. Such words say little about what an Article
+        is about and, since every pair of Articles that has them needs to be
+        compared, make finding the related ones much slower.
+    tokenCache - TextResources.TokenCache or None, where to get the tokens of
+        the texts that have been tokenised before, e.g. in a previous run.
+
+    Returns
+    ----------
+    2-tuple with:
+        * scipy.sparse.csr_matrix of shape (len(articles), no. words) with
+          L2-normalised rows,
+        * numpy.ndarray with the words corresponding to the columns.
+    """
+    tokenise = FullTextIndex.tokenise if tokenCache is None else lambda text: tokenCache.getTokens(text,'words')
+    vocabulary = {} # Word -> column.
+    rows, cols = [], []
+    for i, art in enumerate(articles):
+        start = len(cols)
+        for field in fields:
+            value = getattr(art,field,None) or ''
+            for text in (value if isinstance(value,list) else [value]):
+                for word in tokenise(text):
+                    col = vocabulary.get(word)
+                    if col is None:
+                        col = vocabulary[word] = len(vocabulary)
+                    cols.append(col)
+        rows.append(len(cols)-start)
+    rows = numpy.repeat(numpy.arange(len(articles)),rows)
+    counts = scipy.sparse.coo_matrix((numpy.ones(len(cols),dtype=numpy.float32),(rows,numpy.array(cols,dtype=numpy.int64))),
+        shape=(len(articles),len(vocabulary))).tocsr() # Duplicates are summed.
+
+    # Only keep the words that can tell the Articles apart.
+    documentFrequency = numpy.bincount(counts.indices,minlength=counts.shape[1])
+    keep = numpy.flatnonzero((documentFrequency>=minCount) & (documentFrequency<=maxFraction*len(articles)))
+    counts = counts[:,keep]
+    words = numpy.empty(len(vocabulary),dtype=object)
+    for word, col in vocabulary.iteritems():
+        words[col] = word
+
+    counts.data = numpy.log1p(counts.data) # Sublinear term frequency, one word repeated many times in an abstract isn't that important.
+    counts = counts*scipy.sparse.diags(numpy.log(len(articles)/documentFrequency[keep].astype(numpy.float32)).astype(numpy.float32))
+    return sklearn.preprocessing.normalize(counts.tocsr()), words[keep]
+
+class RelatedArticles(object):
+    """ The k most similar Articles of every Article, according to the cosine
+    similarity of their features. The IDs of the Articles are the rows of
+    the feature matrix, i.e. the indices in allArticles and the nodes of the
+    citation network.
+    """
+    def __init__(self, features, k=10, threshold=0.1, blockSize=1000):
+        """
+        Arguments
+        ----------
+        features - numpy.ndarray or scipy.sparse matrix of shape (no. Articles,
+            no. features), e.g. from buildFeatures or the bool matrix from
+            DownloadArticles.collectArticleFeatures. The rows are normalised here.
+        k - int, how many related Articles to find for every Article.
+        threshold - float, Articles less similar than this aren't related.
+        blockSize - int, no. Articles whose similarities to all the others are
+            computed at once; more is faster but takes more memory.
+        """
+        features = sklearn.preprocessing.normalize(scipy.sparse.csr_matrix(features,dtype=numpy.float32))
+        self.noArticles = features.shape[0]
+        self.k = k
+        self.neighbours = numpy.full((self.noArticles,k),-1,dtype=numpy.int32) # IDs of the related Articles, most similar first, -1 if fewer than k.
+        self.similarities = numpy.zeros((self.noArticles,k),dtype=numpy.float32)
+
+        transposed = features.T.tocsr()
+        for start in xrange(0,self.noArticles,blockSize):
+            block = features[start:start+blockSize]*transposed # Similarities of the block to all the Articles, sparse.
+            rows = numpy.repeat(numpy.arange(block.shape[0]),numpy.diff(block.indptr))
+            keep = (block.data>=threshold) & (block.indices!=rows+start) # Every Article is the most similar to itself.
+            rows, cols, data = rows[keep], block.indices[keep], block.data[keep]
+
+            # Most similar first within every row, then keep the first k of every row.
+            order = numpy.lexsort((-data,rows))
+            rows, cols, data = rows[order], cols[order], data[order]
+            rank = numpy.arange(rows.size)-numpy.searchsorted(rows,rows) # Position within the row.
+            top = rank<k
+            self.neighbours[rows[top]+start,rank[top]] = cols[top]
+            self.similarities[rows[top]+start,rank[top]] = data[top]
+
+    def getRelated(self, articleID, top=None):
+        """ Get the Articles related to an Article.
+
+        Arguments
+        ----------
+        articleID - int with the ID of the Article.
+        top - int or None, return at most this many; all k if None.
+
+        Returns
+        ----------
+        list of 2-tuples with the int IDs of the related Articles and their
+            float similarities, most similar first.
+        """
+        found = self.neighbours[articleID]>=0
+        return zip(self.neighbours[articleID][found][:top].tolist(),self.similarities[articleID][found][:top].tolist())
+
+    def getNeighbourMatrix(self):
+        """ Get the related Articles as a sparse matrix.
+
+        Returns
+        ----------
+        scipy.sparse.csr_matrix of shape (no. Articles, no. Articles) with the
+            similarity of Article j to Article i in row i, column j, if j is
+            one of the k related Articles of i. Isn't symmetric.
+        """
+        found = self.neighbours>=0
+        rows = numpy.repeat(numpy.arange(self.noArticles),found.sum(axis=1))
+        return scipy.sparse.csr_matrix((self.similarities[found],(rows,self.neighbours[found])),
+            shape=(self.noArticles,self.noArticles))
+
+    def getSimilarityGraph(self, minSimilarity=0.):
+        """ Get a graph connecting the related Articles, e.g. to draw it over
+        the citation network.
+
+        Arguments
+        ----------
+        minSimilarity - float, only connect the Articles at least this similar.
+
+        Returns
+        ----------
+        networkx.Graph with the IDs of all the Articles as nodes, and edges
+            between the related ones with their similarity as the 'similarity'
+            attribute.
+        """
+        similar = self.getNeighbourMatrix()
+        similar = similar.maximum(similar.T).tocoo() # Related either way.
+        keep = (similar.row<similar.col) & (similar.data>=minSimilarity)
+        graph = networkx.Graph()
+        graph.add_nodes_from(xrange(self.noArticles))
+        graph.add_weighted_edges_from(zip(similar.row[keep].tolist(),similar.col[keep].tolist(),similar.data[keep].tolist()),
+            weight='similarity')
+        return graph
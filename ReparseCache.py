@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Re-parse every page in the cache, e.g. after Google Scholar changes its markup
+or after a parsing bug has been fixed in DownloadArticles.getArticlesFromSource.
+The cached pages are shared between a pool of processes, which read and parse
+them, and the Articles are streamed into a single output file in the order of
+the cached pages, @see loadReparsed.
+
+Run from the command line:
+    python ReparseCache.py /home/alek/Desktop/cache reparsed.pkl --processes 8
+
+@author: Alek
+@version: 1.0.4
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Skip the pages that are still being written.
+                - 1.0.2 - Alek - Added reparseAuthorLines to only re-parse the authors, journals and years.
+                - 1.0.3 - Alek - Count the pages that fail to parse instead of stopping the whole re-parse.
+                - 1.0.4 - Alek - Don't stop reparseAuthorLines because of one unreadable page either.
+"""
+import os, time, argparse, multiprocessing, cPickle, numpy
+import DownloadArticles, PageClassifier, GoogleScholarSearch
+
+PAGE_FAILED = 'failed' # Class of the pages that couldn't be read or parsed, counted in the statistics of reparseCache.
+
+def listCacheFiles(cacheDir):
+    """ Get the paths to all the cached pages, sorted by name so that the
+    order of the re-parsed Articles is repeatable. Hidden files are the pages
+    that are still being written, @see DownloadArticles.cachePage.
+
+    Arguments
+    ----------
+    cacheDir - str with the directory where the page sources are cached.
+
+    Returns
+    ----------
+    list of str with the paths to the cached pages.
+    """
+    return [os.path.join(cacheDir,name) for name in sorted(os.listdir(cacheDir))
+        if os.path.isfile(os.path.join(cacheDir,name)) and not name.startswith('.')]
+
+def _parseFile(args):
+    """ Read and parse one cached page in a worker process.
+
+    Arguments
+    ----------
+    args - 2-tuple with the path to the cached page and the search terms to
+        give to the Articles.
+
+    Returns
+    ----------
+    3-tuple with the path, the class of the page (@see PageClassifier) and
+        a list of Articles found on it. The class is 'failed' and the list
+        empty if the page couldn't be read or parsed.
+    """
+    fileName, searchTerms = args
+    try:
+        with PageClassifier.openCachedPage(fileName) as page:
+            pageClass = PageClassifier.classifyPage(page)
+            if pageClass!=PageClassifier.PAGE_RESULTS: # Don't waste time reading or parsing pages without articles.
+                return fileName, pageClass, []
+            src = page[:]
+        return fileName, pageClass, DownloadArticles.getArticlesFromSource(src,searchTerms)
+    except Exception as e: # One malformed page shouldn't stop the whole re-parse.
+        print "Couldn't parse {}: {}: {}".format(fileName,type(e).__name__,e)
+        return fileName, PAGE_FAILED, []
+
+def reparseCache(cacheDir, outputFile, noProcesses=None, chunkSize=16, searchTerms=[], progressEvery=1000):
+    """ Parse all the pages in the cache with a pool of processes and save all
+    the Articles found there into one file.
+
+    Arguments
+    ----------
+    cacheDir - str with the directory where the page sources are cached.
+    outputFile - str with the file where to save the Articles. Contains one
+        pickled (path to the page, list of Articles) 2-tuple per results page,
+        in the order of listCacheFiles, @see loadReparsed.
+    noProcesses - int, how many processes to use; as many as there are CPUs
+        if None.
+    chunkSize - int, how many pages to send to a process at once.
+    searchTerms - list of str, search terms to give to all the Articles.
+    progressEvery - int, print the progress every this many pages.
+
+    Returns
+    ----------
+    dict with the statistics of the re-parse: pages, articles, seconds,
+        failed (no. pages that couldn't be parsed), and the no. pages of
+        every class (@see PageClassifier).
+    """
+    fileNames = listCacheFiles(cacheDir)
+    stats = {'pages':0, 'articles':0, PAGE_FAILED:0}
+    start = time.time()
+    pool = multiprocessing.Pool(noProcesses)
+    try:
+        with open(outputFile,"wb") as output:
+            # imap keeps the order of the pages, while the workers parse ahead of the writing.
+            for fileName, pageClass, articles in pool.imap(_parseFile, [(f,searchTerms) for f in fileNames], chunkSize):
+                stats['pages'] += 1
+                stats[pageClass] = stats.get(pageClass,0)+1
+                if articles:
+                    stats['articles'] += len(articles)
+                    cPickle.dump((fileName,articles),output,cPickle.HIGHEST_PROTOCOL)
+                if stats['pages']%progressEvery==0:
+                    dt = time.time()-start
+                    print "Re-parsed {}/{} pages, {} articles, {:.1f} pages/s.".format(stats['pages'],len(fileNames),stats['articles'],stats['pages']/dt)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    stats['seconds'] = time.time()-start
+    print "Re-parsed {} pages with {} articles in {:.1f} s ({:.1f} pages/s), {} pages failed.".format(stats['pages'],
+        stats['articles'],stats['seconds'],stats['pages']/max(1e-9,stats['seconds']),stats[PAGE_FAILED])
+    return stats
+
+def _authorLinesOfFile(fileName):
+    """ Read the author lines of one cached page in a worker process, without
+    parsing its HTML, @see GoogleScholarSearch.findAuthorLines.
+
+    Returns
+    ----------
+    list of unicode with the author lines, empty unless it's a results page or
+        if the page couldn't be read, like in _parseFile.
+    """
+    try:
+        with PageClassifier.openCachedPage(fileName) as page:
+            if PageClassifier.classifyPage(page)!=PageClassifier.PAGE_RESULTS:
+                return []
+            return GoogleScholarSearch.findAuthorLines(page[:])
+    except Exception as e: # One malformed page shouldn't stop the whole re-parse.
+        print "Couldn't read the author lines of {}: {}: {}".format(fileName,type(e).__name__,e)
+        return []
+
+def reparseAuthorLines(cacheDir, noProcesses=None, chunkSize=16):
+    """ Re-parse only the authors, journals, years and venue URLs of all the
+    Articles in the cache, e.g. after GoogleScholarSearch.AuthorLinePattern
+    has been improved. The pages aren't parsed with BeautifulSoup, the processes
+    only cut the author lines out of them, and all the lines are then parsed
+    at once with GoogleScholarSearch.parseAuthorLines. The Articles are in the
+    order of the pages, like in the output of reparseCache, but the lines are
+    cut out of the pages without parsing them: the pages that reparseCache
+    counts as PAGE_FAILED, because they can be read but not parsed, and the
+    [CITATION] records, which reparseCache skips, still have their lines here.
+    Match the Articles by their 'page' rather than by their position.
+
+    Arguments
+    ----------
+    cacheDir - str with the directory where the page sources are cached.
+    noProcesses - int, how many processes to use; as many as there are CPUs
+        if None.
+    chunkSize - int, how many pages to send to a process at once.
+
+    Returns
+    ----------
+    2-tuple with:
+        * list of str with the paths to the cached pages, @see listCacheFiles,
+        * dict with the columns from GoogleScholarSearch.parseAuthorLines, plus
+          'page' - numpy.ndarray of int64 with the index of the page of every Article.
+    """
+    fileNames = listCacheFiles(cacheDir)
+    start = time.time()
+    pool = multiprocessing.Pool(noProcesses)
+    try:
+        lines = pool.map(_authorLinesOfFile, fileNames, chunkSize)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    columns = GoogleScholarSearch.parseAuthorLines([line for pageLines in lines for line in pageLines])
+    columns['page'] = numpy.repeat(numpy.arange(len(fileNames)),[len(pageLines) for pageLines in lines])
+    print "Re-parsed the author lines of {} articles on {} pages in {:.1f} s.".format(len(columns['page']),len(fileNames),
+        time.time()-start)
+    return fileNames, columns
+
+def loadReparsed(fileName):
+    """ Read the Articles saved by reparseCache one page at a time.
+
+    Arguments
+    ----------
+    fileName - str with the output file of reparseCache.
+
+    Yields
+    ----------
+    2-tuples with the path to the cached page and a list of Articles from it.
+    """
+    with open(fileName,"rb") as reparsed:
+        while True:
+            try:
+                yield cPickle.load(reparsed)
+            except EOFError:
+                return
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Re-parse all the cached Google Scholar pages.")
+    parser.add_argument('cacheDir', nargs='?', default=DownloadArticles.CACHE_DIR, help="Directory with the cached pages.")
+    parser.add_argument('outputFile', nargs='?', default='reparsed.pkl', help="Where to save the Articles.")
+    parser.add_argument('--processes', type=int, default=None, help="No. processes, all the CPUs by default.")
+    parser.add_argument('--chunk', type=int, default=16, help="No. pages sent to a process at once.")
+    args = parser.parse_args()
+    reparseCache(args.cacheDir, args.outputFile, args.processes, args.chunk)
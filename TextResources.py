@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon 19 Oct 2026
+
+Everything needed to split the Titles and Abstracts of the Articles into
+tokens, built once per process rather than on every call: the set of NLTK's
+English stopwords, the punctuation and the compiled tokeniser patterns. The
+tokens of every text can also be kept in a TokenCache, keyed by the hash of
+the text, and saved next to the Articles (@see ArticleStore), so that running
+the keyword extraction, building the features or clustering again only
+tokenises the Articles that have been added or changed since.
+
+Example
+----------
+<tt>
+> tokenCache = TokenCache(getTokenCacheFile('articles.npz'))\n
+> keywords, frequencies = DownloadArticles.getArticleKeywords(allArticles, tokenCache=tokenCache)\n
+> features, words = RelatedArticles.buildFeatures(allArticles, tokenCache=tokenCache)\n
+> tokenCache.save()
+</tt>
+
+@author: Alek
+@version: 1.0.2
+@since: Mon 19 Oct 2026
+
+CHANGELOG:
+Mon 19 Oct 2026 - 1.0.0 - Alek - Issued the first version.
+                - 1.0.1 - Alek - Tokenise the decoded titles, not their UTF-8 bytes (GoogleScholarSearch has always given UTF-8 str titles).
+                - 1.0.2 - Alek - FORMAT_VERSION 3, FullTextIndex.tokenise now splits the decoded text too.
+"""
+import os, re, string, hashlib, numpy, nltk
+import ArticleStore, FullTextIndex
+
+FORMAT_VERSION = 3 # Change when the tokenisers change, so that the old tokens aren't used.
+
+WordPunctPattern = re.compile(r'\w+|[^\w\s]+', re.UNICODE|re.MULTILINE|re.DOTALL) # The same as nltk.wordpunct_tokenize.
+
+_stopwords = None # Loaded from the NLTK corpus the first time they're needed.
+
+def getStopwords():
+    """ Get the English stopwords, read from nltk.corpus.stopwords only once.
+
+    Returns
+    ----------
+    frozenset of str with the lower-case stopwords.
+
+    Raises
+    ----------
+    LookupError if the NLTK stopwords corpus isn't installed, @see nltk.download.
+    """
+    global _stopwords
+    if _stopwords is None:
+        _stopwords = frozenset(word.encode('utf-8') if isinstance(word,unicode) else word
+            for word in nltk.corpus.stopwords.words('english'))
+    return _stopwords
+
+def isKeywordToken(token, stopwords=None):
+    """ Check if a token can be a part of a keyword, i.e. isn't a stopword or
+    punctuation (@see DownloadArticles.getArticleKeywords).
+
+    Arguments
+    ----------
+    token - str with the token.
+    stopwords - frozenset of str with the stopwords, getStopwords() if None.
+    """
+    stopwords = getStopwords() if stopwords is None else stopwords
+    return not token.lower() in stopwords and not token in string.punctuation
+
+def keywordTokens(text):
+    """ Split text into words and punctuation like nltk.wordpunct_tokenize and
+    remove the stopwords and punctuation.
+
+    Arguments
+    ----------
+    text - UTF-8 str or unicode with e.g. the Title of an Article.
+
+    Returns
+    ----------
+    list of UTF-8 str with the tokens in the order they appear in the text.
+    """
+    stopwords = getStopwords()
+    if not isinstance(text,unicode): # Split the characters, not their bytes.
+        text = text.decode('utf-8','replace')
+    tokens = [token.encode('utf-8') for token in WordPunctPattern.findall(text)]
+    return [token for token in tokens if isKeywordToken(token,stopwords)]
+
+" Ways of splitting texts into tokens that TokenCache knows. "
+TOKENISERS = {'keywords':keywordTokens, # For DownloadArticles.getArticleKeywords.
+    'words':FullTextIndex.tokenise} # For FullTextIndex and RelatedArticles.buildFeatures.
+
+def getTokenCacheFile(articlesFile):
+    """ Get the file where to keep the tokens of the Articles saved in the
+    given ArticleStore file, e.g. articles.npz -> articles.tokens.npz. """
+    return os.path.splitext(articlesFile)[0]+'.tokens.npz'
+
+def _hashText(kind, text):
+    """ Key of the tokens of a text in a TokenCache. """
+    if isinstance(text,unicode):
+        text = text.encode('utf-8')
+    return hashlib.sha1(kind+'\0'+text).hexdigest()
+
+class TokenCache(object):
+    """ Tokens of texts, computed once and looked up by the SHA1 of the text,
+    so the same text is never tokenised twice, no matter which Article it
+    belongs to or where the Article is in the list. Can be saved to and
+    loaded from a .npz file in the format of ArticleStore.
+    """
+    def __init__(self, fileName=None):
+        """
+        Arguments
+        ----------
+        fileName - str with the .npz file where the tokens are saved, @see
+            getTokenCacheFile. The tokens saved there are loaded if it exists
+            and was saved with the current FORMAT_VERSION. None to keep the
+            tokens in memory only.
+        """
+        self.fileName = fileName
+        self.tokens = {} # Hash of the text -> list of str with its tokens.
+        self.hits = 0
+        self.misses = 0
+        self.modified = False # Whether anything's been added since the tokens were loaded or saved.
+        if fileName is not None and os.path.isfile(fileName):
+            self.load(fileName)
+
+    def getTokens(self, text, kind='keywords'):
+        """ Get the tokens of a text, tokenising it only if it's not been seen before.
+
+        Arguments
+        ----------
+        text - str or unicode with the text.
+        kind - str, one of TOKENISERS, which tokeniser to use.
+
+        Returns
+        ----------
+        list of str with the tokens. Don't modify it, it's the cached one.
+        """
+        key = _hashText(kind,text)
+        tokens = self.tokens.get(key)
+        if tokens is None:
+            tokens = self.tokens[key] = TOKENISERS[kind](text)
+            self.misses += 1
+            self.modified = True
+        else:
+            self.hits += 1
+        return tokens
+
+    def load(self, fileName):
+        """ Add the tokens saved in a file to the cache. Files saved with
+        another FORMAT_VERSION are ignored.
+
+        Arguments
+        ----------
+        fileName - str with the .npz file saved with save().
+        """
+        with numpy.load(fileName) as archive:
+            if int(archive['version'][0])!=FORMAT_VERSION:
+                print "Ignoring the tokens in {}, they were saved with version {}.".format(fileName,int(archive['version'][0]))
+                return
+            keys = archive['keys'].tolist()
+            values = ArticleStore.unpackStrings(archive['tokens.data'],archive['tokens.offsets'])
+            lists = archive['tokens.lists'].tolist()
+        for i, key in enumerate(keys):
+            self.tokens[key] = values[lists[i]:lists[i+1]]
+
+    def save(self, fileName=None, compressed=True):
+        """ Save all the tokens, if any have been added.
+
+        Arguments
+        ----------
+        fileName - str with the .npz file, the one given to the constructor if None.
+        compressed - bool, whether to compress the file.
+        """
+        fileName = self.fileName if fileName is None else fileName
+        if not self.modified and fileName==self.fileName:
+            return
+        keys = self.tokens.keys()
+        lists = [self.tokens[key] for key in keys]
+        columns = {'version':numpy.array([FORMAT_VERSION]), 'keys':numpy.array(keys,dtype='S40')}
+        columns['tokens.data'], columns['tokens.offsets'] = ArticleStore.packStrings([t for l in lists for t in l])
+        columns['tokens.lists'] = numpy.zeros(len(lists)+1,dtype=numpy.int64)
+        numpy.cumsum([len(l) for l in lists],out=columns['tokens.lists'][1:])
+        with open(fileName,"wb") as output: # numpy.savez would add .npz to the name otherwise.
+            if compressed:
+                numpy.savez_compressed(output,**columns)
+            else:
+                numpy.savez(output,**columns)
+        if fileName==self.fileName:
+            self.modified = False